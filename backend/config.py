@@ -1,23 +1,32 @@
 """Application configuration and settings."""
+import logging
+import os
 from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+BACKEND_DIR = Path(__file__).resolve().parent
+
+logger = logging.getLogger(__name__)
+
 
 def _resolve_env_file() -> str:
     """Locate the most appropriate .env file (repo root fallback -> backend/.env)."""
-    backend_dir = Path(__file__).resolve().parent
-    repo_root = backend_dir.parent
-    
     candidates = [
-        repo_root / ".env",      # preferred: root-level .env (earlier behavior)
-        backend_dir / ".env",    # fallback: backend/.env (current file)
+        BACKEND_DIR.parent / ".env",  # preferred: root-level .env (earlier behavior)
+        BACKEND_DIR / ".env",         # fallback: backend/.env (current file)
     ]
     
     chosen: Optional[Path] = next((path for path in candidates if path.exists()), None)
-    return str(chosen or backend_dir / ".env")
+    return str(chosen or BACKEND_DIR / ".env")
+
+
+def _env_covers_all_fields() -> bool:
+    """True when every setting is already provided by an environment variable."""
+    env_names = {name.upper() for name in os.environ}
+    return all(field.upper() in env_names for field in Settings.model_fields)
 
 
 class Settings(BaseSettings):
@@ -26,13 +35,18 @@ class Settings(BaseSettings):
     # SinkIn API (pydantic will match SINKIN_API_KEY in .env automatically)
     sinkin_api_key: str = ""
     sinkin_base_url: str = "https://sinkin.ai/api"
+    # gzip text2img request bodies over 1 KiB; only for endpoints that accept Content-Encoding
+    sinkin_gzip_requests: bool = False
     
     # Storage paths
-    images_dir: str = str(Path(__file__).resolve().parent / "storage" / "images")
-    assets_dir: str = str(Path(__file__).resolve().parent / "storage" / "assets")
+    images_dir: str = str(BACKEND_DIR / "storage" / "images")
+    assets_dir: str = str(BACKEND_DIR / "storage" / "assets")
+
+    # Write large downloaded images with O_DIRECT, bypassing the page cache (Linux only)
+    direct_io_downloads: bool = False
     
+    # env_file is resolved in get_settings() so importing this module does no file I/O
     model_config = SettingsConfigDict(
-        env_file=_resolve_env_file(),
         env_file_encoding="utf-8",
         extra="ignore",
         case_sensitive=False,  # Allows matching SINKIN_API_KEY to sinkin_api_key
@@ -41,7 +55,8 @@ class Settings(BaseSettings):
 
 @lru_cache()
 def get_settings() -> Settings:
-    """Get cached settings instance."""
-    settings = Settings()
-    print(f"DEBUG: Loaded settings. API Key present: {bool(settings.sinkin_api_key)}")
+    """Get cached settings instance, skipping the .env lookup when env vars cover every field."""
+    env_file = None if _env_covers_all_fields() else _resolve_env_file()
+    settings = Settings(_env_file=env_file)
+    logger.debug("⚙️ Settings loaded | env_file=%s api_key_present=%s", env_file, bool(settings.sinkin_api_key))
     return settings
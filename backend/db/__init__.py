@@ -1,3 +1,3 @@
 """Database module for SQLite storage."""
-from .database import engine, SessionLocal, get_db, init_db
-from .models import Base, Run, Image, Config, Asset, Job
+from .database import engine, SessionLocal, get_db, init_db, bulk_insert
+from .models import Base, Run, Image, Config, Inference, Asset, Job, UpscaleJob
@@ -1,20 +1,55 @@
 """SQLite database connection and session management."""
 import os
-from sqlalchemy import create_engine, text
+import orjson
+from sqlalchemy import Connection, create_engine, event, insert, inspect
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Any, Dict, Generator, List, Type
+
+from .models import Base
 
 # Database file path (relative to backend directory)
-DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "experiments.db")
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+DATABASE_PATH = os.path.join(BACKEND_DIR, "experiments.db")
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+ALEMBIC_INI_PATH = os.path.join(BACKEND_DIR, "alembic.ini")
+
+# Recorded in PRAGMA user_version once migrations reach head; bump with every new revision
+SCHEMA_VERSION = 16
+
+def _json_dumps(value: Any) -> str:
+    """Serialize JSON column values with orjson; the SQLite driver binds text, not bytes."""
+    return orjson.dumps(value).decode()
+
 
 # Create engine with SQLite-specific settings
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},  # Needed for SQLite with FastAPI
     echo=False,  # Set to True for SQL debugging
+    # JSON columns (flaws, job configs, raw inference data) go through orjson both ways
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads,
 )
 
+# Per-connection SQLite tuning: WAL lets readers run alongside the job writer,
+# NORMAL sync is durable under WAL, and mmap/cache serve the analysis scans from memory
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+
+@event.listens_for(engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -28,39 +63,33 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def _ensure_images_columns() -> None:
-    """Add newly introduced columns to existing SQLite databases when missing."""
-    columns_to_add = [
-        ("score_overall", "INTEGER"),
-        ("score_facial_detail_realism", "INTEGER"),
-        ("score_body_proportions", "INTEGER"),
-        ("score_complexity_artistry", "INTEGER"),
-        ("score_composition_framing", "INTEGER"),
-        ("score_lighting_color", "INTEGER"),
-        ("score_resolution_clarity", "INTEGER"),
-        ("score_style_consistency", "INTEGER"),
-        ("score_prompt_adherence", "INTEGER"),
-        ("score_artifacts", "INTEGER"),
-        ("use_again", "TEXT"),
-        ("flaws", "TEXT"),
-        ("curation_status", "VARCHAR(20)"),
-        ("is_failed", "BOOLEAN NOT NULL DEFAULT 0"),
-        ("batch_index", "INTEGER"),
-    ]
+def bulk_insert(db: Session, model: Type[Base], rows: List[Dict[str, Any]]) -> None:
+    """Insert many rows of model with a single executemany INSERT, bypassing the identity map."""
+    if rows:
+        db.execute(insert(model), rows)
 
-    with engine.begin() as conn:
-        result = conn.execute(text("PRAGMA table_info('images')"))
-        existing_columns = {row[1] for row in result.fetchall()}
 
-        for name, ddl in columns_to_add:
-            if name not in existing_columns:
-                conn.execute(text(f"ALTER TABLE images ADD COLUMN {name} {ddl}"))
-                print(f"🛠️ Added missing column to images table: {name}")
+def _migrate(conn: Connection) -> None:
+    """Create or upgrade the schema with Alembic and record SCHEMA_VERSION."""
+    from alembic import command
+    from alembic.config import Config
+    from .models import Base
+
+    alembic_cfg = Config(ALEMBIC_INI_PATH)
+    alembic_cfg.attributes["connection"] = conn
+    if not inspect(conn).has_table("runs"):
+        # Fresh database: build the current schema directly and mark it as up to date
+        Base.metadata.create_all(bind=conn)
+        command.stamp(alembic_cfg, "head")
+    else:
+        command.upgrade(alembic_cfg, "head")
+    conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 
 def init_db() -> None:
-    """Initialize the database by creating all tables."""
-    from .models import Base
-    Base.metadata.create_all(bind=engine)
-    _ensure_images_columns()
+    """Initialize the database and bring its schema up to the latest migration."""
+    with engine.begin() as conn:
+        # Hot path: an up-to-date database needs no Alembic machinery at all
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() != SCHEMA_VERSION:
+            _migrate(conn)
     print(f"✅ Database initialized at: {DATABASE_PATH}")
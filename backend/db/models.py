@@ -1,9 +1,10 @@
 """SQLAlchemy models for the SinkIn Image Experimentation app."""
+import os
 import uuid
-from datetime import datetime
+from collections import deque
 from sqlalchemy import (
-    Column, String, Integer, Float, Text, DateTime, Boolean,
-    ForeignKey, Enum as SQLEnum
+    Column, String, Integer, Float, Text, DateTime, Boolean, JSON,
+    Computed, ForeignKey, Index, Enum as SQLEnum, func
 )
 from sqlalchemy.orm import DeclarativeBase, relationship
 import enum
@@ -30,9 +31,45 @@ class UseAgain(enum.Enum):
     top_1pct = "top_1pct"
 
 
+def _enum_values(enum_cls) -> list:
+    """Persist enum members by value; SQLEnum otherwise stores member names."""
+    return [member.value for member in enum_cls]
+
+
+def utc_now():
+    """SQL expression for the database's current UTC time, with millisecond precision."""
+    return func.strftime("%Y-%m-%d %H:%M:%f", "now")
+
+
+# created_at rendered exactly as datetime.isoformat() would, computed by SQLite on read
+CREATED_AT_ISO_SQL = (
+    "replace(substr(created_at, 1, 19), ' ', 'T') || "
+    "CASE WHEN CAST(substr(created_at, 21) AS INTEGER) = 0 THEN '' "
+    "ELSE '.' || substr(substr(created_at, 21) || '000000', 1, 6) END"
+)
+
+
+# Random UUIDs are drawn from one os.urandom() call per batch instead of one per row
+_UUID_BATCH_SIZE = 256
+_uuid_pool: "deque[str]" = deque()
+
+
+def _refill_uuid_pool() -> None:
+    """Fill the pool with a fresh batch of version-4 UUID strings."""
+    randomness = os.urandom(16 * _UUID_BATCH_SIZE)
+    _uuid_pool.extend(
+        str(uuid.UUID(bytes=randomness[offset:offset + 16], version=4))
+        for offset in range(0, len(randomness), 16)
+    )
+
+
 def generate_uuid() -> str:
     """Generate a new UUID string."""
-    return str(uuid.uuid4())
+    while True:
+        try:
+            return _uuid_pool.popleft()
+        except IndexError:
+            _refill_uuid_pool()
 
 
 class Run(Base):
@@ -42,7 +79,7 @@ class Run(Base):
     id = Column(String(36), primary_key=True, default=generate_uuid)
     batch_number = Column(Integer, unique=True, nullable=False)
     name = Column(String(255), nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, server_default=utc_now(), nullable=False)
     prompt = Column(Text, nullable=False)
     negative_prompt = Column(Text, nullable=True)
     model_id = Column(String(50), nullable=False)
@@ -51,6 +88,12 @@ class Run(Base):
     # Relationships
     images = relationship("Image", back_populates="run", cascade="all, delete-orphan")
     jobs = relationship("Job", back_populates="run", cascade="all, delete-orphan")
+    inferences = relationship("Inference", back_populates="run", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # list_runs pages newest first by (created_at, id)
+        Index("ix_runs_created_id", "created_at", "id"),
+    )
 
 
 class Image(Base):
@@ -61,10 +104,14 @@ class Image(Base):
     run_id = Column(String(36), ForeignKey("runs.id"), nullable=False)
     file_path = Column(String(500), nullable=True)
     upscale_url = Column(String(500), nullable=True)
+    source_url = Column(String(500), nullable=True)  # Original SinkIn URL, used for upscaling
     inf_id = Column(String(100), nullable=True)  # SinkIn inference ID
     batch_index = Column(Integer, nullable=True)  # Index in the batch (0-N)
     is_failed = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, server_default=utc_now(), nullable=False)
+    created_at_iso = Column(String(26), Computed(CREATED_AT_ISO_SQL, persisted=False))
+    # Bumped by every UPDATE (ORM or Core); feeds the images API's ETags
+    updated_at = Column(DateTime, server_default=utc_now(), onupdate=utc_now(), nullable=False)
 
     # Legacy scoring fields (kept for historical data but no longer used)
     overall_quality = Column(Integer, nullable=True)  # 1-10
@@ -85,13 +132,37 @@ class Image(Base):
     score_artifacts = Column(Integer, nullable=True)
 
     # Additional metadata
-    use_again = Column(SQLEnum(UseAgain), nullable=True)
-    flaws = Column(Text, nullable=True)  # JSON list of flaws tags
+    use_again = Column(SQLEnum(UseAgain, native_enum=False, values_callable=_enum_values), nullable=True)
+    flaws = Column(JSON(none_as_null=True), nullable=True)  # List of flaw tags
     curation_status = Column(String(20), nullable=True)  # "trash", "use_again", "top_1pct"
 
     # Relationships
     run = relationship("Run", back_populates="images")
     config = relationship("Config", back_populates="image", uselist=False, cascade="all, delete-orphan")
+    upscale_jobs = relationship("UpscaleJob", back_populates="image", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Per-run listings and the analysis ORDER BY (batch DESC, created_at DESC);
+        # runs.batch_number is already covered by its unique index
+        Index("ix_images_run_created", "run_id", "created_at"),
+        # Gallery navigation within a run only ever looks at images that did not fail
+        Index(
+            "ix_images_run_created_ok",
+            "run_id",
+            created_at.desc(),
+            sqlite_where=is_failed.is_(False),
+        ),
+        # The unfiltered gallery listing and its unrated-only variant
+        Index("ix_images_created_ok", created_at.desc(), sqlite_where=is_failed.is_(False)),
+        Index(
+            "ix_images_unrated_created_ok",
+            created_at.desc(),
+            sqlite_where=score_overall.is_(None) & is_failed.is_(False),
+        ),
+        # Covers the per-run stats aggregate (get_image_stats): id is carried for
+        # the configs join so the images side never touches the table
+        Index("ix_images_run_score_upscale", "run_id", "score_overall", "upscale_url", "id"),
+    )
 
 
 class Config(Base):
@@ -113,11 +184,29 @@ class Config(Base):
     
     # Cost and raw data
     credit_cost = Column(Float, nullable=True)
-    raw_payload_json = Column(Text, nullable=True)  # Full request JSON
-    raw_response_json = Column(Text, nullable=True)  # Full response JSON
+    inference_id = Column(Integer, ForeignKey("inferences.id"), nullable=True)  # Shared raw request/response
+    raw_payload_json = Column(JSON(none_as_null=True), nullable=True)  # Legacy: full request JSON
+    raw_response_json = Column(JSON(none_as_null=True), nullable=True)  # Legacy: full response JSON
 
     # Relationships
     image = relationship("Image", back_populates="config")
+    inference = relationship("Inference", back_populates="configs")
+
+
+class Inference(Base):
+    """One SinkIn /inference call, whose raw request and response all its images share."""
+    __tablename__ = "inferences"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String(36), ForeignKey("runs.id"), nullable=False, index=True)
+    inf_id = Column(String(100), nullable=True)  # SinkIn inference ID
+    raw_payload_json = Column(JSON(none_as_null=True), nullable=True)  # Full request JSON
+    raw_response_json = Column(JSON(none_as_null=True), nullable=True)  # Full response JSON
+    created_at = Column(DateTime, server_default=utc_now(), nullable=False)
+
+    # Relationships
+    run = relationship("Run", back_populates="inferences")
+    configs = relationship("Config", back_populates="inference")
 
 
 class Asset(Base):
@@ -128,7 +217,8 @@ class Asset(Base):
     original_filename = Column(String(255), nullable=False)
     mime_type = Column(String(100), nullable=True)
     file_path = Column(String(500), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sha256 = Column(String(64), nullable=True)  # Hex digest of the uploaded bytes
+    created_at = Column(DateTime, server_default=utc_now(), nullable=False)
 
     # Relationships
     jobs = relationship("Job", back_populates="init_image_asset")
@@ -140,13 +230,48 @@ class Job(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     run_id = Column(String(36), ForeignKey("runs.id"), nullable=False)
-    status = Column(SQLEnum(JobStatus), default=JobStatus.queued, nullable=False)
-    config_json = Column(Text, nullable=False)  # Job configuration as JSON
+    status = Column(
+        SQLEnum(JobStatus, native_enum=False, values_callable=_enum_values),
+        default=JobStatus.queued,
+        nullable=False,
+    )
+    config_json = Column(JSON, nullable=False)  # Job configuration dict
     init_image_asset_id = Column(String(36), ForeignKey("assets.id"), nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, server_default=utc_now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
 
     # Relationships
     run = relationship("Run", back_populates="jobs")
     init_image_asset = relationship("Asset", back_populates="jobs")
+
+    __table_args__ = (
+        # Queue head lookup (get_next_job) and cancel-all across runs
+        Index("ix_jobs_status_created", "status", "created_at"),
+        # Per-run status counts and per-run cancel-all
+        Index("ix_jobs_run_status_created", "run_id", "status", "created_at"),
+    )
+
+
+class UpscaleJob(Base):
+    """Background upscale of one image; its row outlives the request that queued it."""
+    __tablename__ = "upscale_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    image_id = Column(String(36), ForeignKey("images.id"), nullable=False, index=True)
+    status = Column(
+        SQLEnum(JobStatus, native_enum=False, values_callable=_enum_values),
+        default=JobStatus.queued,
+        nullable=False,
+    )
+    upscale_type = Column(String(20), nullable=False)  # "esrgan" or "hires_fix"
+    scale = Column(Float, nullable=True)
+    strength = Column(Float, nullable=True)
+    upscale_url = Column(String(500), nullable=True)
+    credit_cost = Column(Float, nullable=True)
+    created_at = Column(DateTime, server_default=utc_now(), nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+    # Relationships
+    image = relationship("Image", back_populates="upscale_jobs")
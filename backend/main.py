@@ -1,21 +1,23 @@
 """
 SinkIn Image Experimentation Web App - Backend API
 """
+import asyncio
 import logging
 import sys
 from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from db import init_db
 from routes.jobs import router as jobs_router
-from routes.images import router as images_router
+from routes.images import router as images_router, fail_interrupted_upscale_jobs
 from routes.runs import router as runs_router
 from routes.assets import router as assets_router
 from routes.analysis import router as analysis_router
-from services.sinkin import sinkin_service
+from services.sinkin import get_sinkin_service
 
 from config import get_settings
 
@@ -31,11 +33,10 @@ if not logging.getLogger().handlers:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
-    # Startup: Initialize database and storage directories
+    # Startup: Initialize database (storage directories are created at import below)
     init_db()
-    settings = get_settings()
-    Path(settings.images_dir).mkdir(parents=True, exist_ok=True)
-    Path(settings.assets_dir).mkdir(parents=True, exist_ok=True)
+    fail_interrupted_upscale_jobs()
+    get_sinkin_service().warmup()
     yield
     # Shutdown: cleanup if needed
 
@@ -45,6 +46,7 @@ app = FastAPI(
     description="Local-first platform for text-to-image experiments using SinkIn AI",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware for frontend connection
@@ -70,7 +72,8 @@ images_path = Path(settings.images_dir)
 assets_path = Path(settings.assets_dir)
 images_path.mkdir(parents=True, exist_ok=True)
 assets_path.mkdir(parents=True, exist_ok=True)
-app.mount("/images", StaticFiles(directory=str(images_path)), name="images")
+# Directory exists by now, so skip StaticFiles' own existence check
+app.mount("/images", StaticFiles(directory=str(images_path), check_dir=False), name="images")
 
 
 @app.get("/")
@@ -89,7 +92,8 @@ async def health_check():
 async def get_models():
     """Get available models from SinkIn API."""
     try:
-        result = sinkin_service.get_models()
+        # The SinkIn client blocks on requests; keep it off the event loop
+        result = await asyncio.to_thread(get_sinkin_service().get_models)
         if result.get("error_code", 0) != 0:
             raise HTTPException(status_code=500, detail=result.get("message", "Failed to fetch models"))
         return result
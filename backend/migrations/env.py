@@ -0,0 +1,52 @@
+"""Alembic environment for the experiments SQLite database."""
+from logging.config import fileConfig
+
+from alembic import context
+
+from db.database import engine
+from db.models import Base
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL to stdout without a live database connection."""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,  # SQLite needs move-and-copy for most ALTERs
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_with_connection(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,  # SQLite needs move-and-copy for most ALTERs
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations on the connection handed over by init_db (or a fresh one from the CLI)."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
+    # Invoked from the `alembic` CLI: configure logging from alembic.ini
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    with engine.connect() as connection:
+        _run_with_connection(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
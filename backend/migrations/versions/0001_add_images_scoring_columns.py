@@ -0,0 +1,64 @@
+"""Add scoring, curation and batch columns to images
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Columns introduced after the original images table shipped
+IMAGE_COLUMNS = [
+    ("score_overall", sa.Integer()),
+    ("score_facial_detail_realism", sa.Integer()),
+    ("score_body_proportions", sa.Integer()),
+    ("score_complexity_artistry", sa.Integer()),
+    ("score_composition_framing", sa.Integer()),
+    ("score_lighting_color", sa.Integer()),
+    ("score_resolution_clarity", sa.Integer()),
+    ("score_style_consistency", sa.Integer()),
+    ("score_prompt_adherence", sa.Integer()),
+    ("score_artifacts", sa.Integer()),
+    ("use_again", sa.Text()),
+    ("flaws", sa.Text()),
+    ("curation_status", sa.String(20)),
+    ("is_failed", sa.Boolean()),
+    ("batch_index", sa.Integer()),
+]
+
+
+def _build_column(name: str, type_: sa.types.TypeEngine) -> sa.Column:
+    if name == "is_failed":
+        return sa.Column(name, type_, nullable=False, server_default=sa.text("0"))
+    return sa.Column(name, type_, nullable=True)
+
+
+def upgrade() -> None:
+    # Databases created before migrations existed may already carry some of these
+    existing_columns = {col["name"] for col in sa.inspect(op.get_bind()).get_columns("images")}
+    missing = [(name, type_) for name, type_ in IMAGE_COLUMNS if name not in existing_columns]
+    if not missing:
+        return
+
+    # One batch pass inside the migration transaction: either every column lands or none do.
+    # ADD COLUMN is a metadata-only change in SQLite, so "auto" avoids copying the table.
+    with op.batch_alter_table("images", recreate="auto") as batch_op:
+        for name, type_ in missing:
+            batch_op.add_column(_build_column(name, type_))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("images") as batch_op:
+        for name, _ in reversed(IMAGE_COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,27 @@
+"""Index images by run and creation time
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_images_run_created", "images", ["run_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_images_run_created", table_name="images")
@@ -0,0 +1,48 @@
+"""Fill created_at on the database side
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("runs", "images", "assets", "jobs")
+
+# Matches db.models.utc_now(); SQLite requires expression defaults in parentheses
+UTC_NOW_DEFAULT = sa.text("(strftime('%Y-%m-%d %H:%M:%f', 'now'))")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                "created_at",
+                existing_type=sa.DateTime(),
+                existing_nullable=False,
+                server_default=UTC_NOW_DEFAULT,
+            )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                "created_at",
+                existing_type=sa.DateTime(),
+                existing_nullable=False,
+                server_default=None,
+            )
@@ -0,0 +1,30 @@
+"""Add a content hash to assets
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("assets") as batch_op:
+        batch_op.add_column(sa.Column("sha256", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("assets") as batch_op:
+        batch_op.drop_column("sha256")
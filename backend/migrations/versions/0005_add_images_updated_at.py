@@ -0,0 +1,39 @@
+"""Track when each image row last changed
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Matches db.models.utc_now(); SQLite requires expression defaults in parentheses
+UTC_NOW_DEFAULT = sa.text("(strftime('%Y-%m-%d %H:%M:%f', 'now'))")
+
+
+def upgrade() -> None:
+    # ADD COLUMN cannot carry a non-constant default, so rebuild the table to get one
+    with op.batch_alter_table("images", recreate="always") as batch_op:
+        batch_op.add_column(
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=UTC_NOW_DEFAULT)
+        )
+    # Existing rows have not changed since they were created
+    op.execute("UPDATE images SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("images") as batch_op:
+        batch_op.drop_column("updated_at")
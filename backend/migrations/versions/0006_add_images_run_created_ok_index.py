@@ -0,0 +1,34 @@
+"""Partial index for non-failed images by run and creation time
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The WHERE clause must match the routes' "is_failed IS 0" for SQLite to use the index
+    op.create_index(
+        "ix_images_run_created_ok",
+        "images",
+        ["run_id", sa.text("created_at DESC")],
+        sqlite_where=sa.text("is_failed IS 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_images_run_created_ok", table_name="images")
@@ -0,0 +1,42 @@
+"""Store each image's original SinkIn URL
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("images", recreate="auto") as batch_op:
+        batch_op.add_column(sa.Column("source_url", sa.String(500), nullable=True))
+
+    # Backfill from the stored generation responses; rows whose JSON is missing,
+    # malformed or short stay NULL and are resolved by the upscale route's fallback
+    op.execute(
+        """
+        UPDATE images SET source_url = (
+            SELECT json_extract(configs.raw_response_json, '$.images[' || COALESCE(images.batch_index, 0) || ']')
+            FROM configs
+            WHERE configs.image_id = images.id AND json_valid(configs.raw_response_json)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("images") as batch_op:
+        batch_op.drop_column("source_url")
@@ -0,0 +1,41 @@
+"""Add a generated ISO-8601 rendering of images.created_at
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-15 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same expression as db.models.CREATED_AT_ISO_SQL at the time of this revision
+CREATED_AT_ISO_SQL = (
+    "replace(substr(created_at, 1, 19), ' ', 'T') || "
+    "CASE WHEN CAST(substr(created_at, 21) AS INTEGER) = 0 THEN '' "
+    "ELSE '.' || substr(substr(created_at, 21) || '000000', 1, 6) END"
+)
+
+
+def upgrade() -> None:
+    # VIRTUAL generated columns can be added in place; STORED ones would need a table rebuild
+    with op.batch_alter_table("images", recreate="auto") as batch_op:
+        batch_op.add_column(
+            sa.Column("created_at_iso", sa.String(26), sa.Computed(CREATED_AT_ISO_SQL, persisted=False))
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("images") as batch_op:
+        batch_op.drop_column("created_at_iso")
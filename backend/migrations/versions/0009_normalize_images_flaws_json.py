@@ -0,0 +1,32 @@
+"""Make every stored images.flaws value a JSON array
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-15 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # flaws is now mapped as JSON. SQLite stores JSON as text either way, so the
+    # column definition stays; only legacy plain-string values need wrapping.
+    op.execute(
+        "UPDATE images SET flaws = json_array(flaws) "
+        "WHERE flaws IS NOT NULL AND NOT json_valid(flaws)"
+    )
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,52 @@
+"""Add the upscale_jobs table for background upscales
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-15 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upscale_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("image_id", sa.String(36), sa.ForeignKey("images.id"), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("queued", "running", "completed", "failed", name="jobstatus", native_enum=False),
+            nullable=False,
+        ),
+        sa.Column("upscale_type", sa.String(20), nullable=False),
+        sa.Column("scale", sa.Float(), nullable=True),
+        sa.Column("strength", sa.Float(), nullable=True),
+        sa.Column("upscale_url", sa.String(500), nullable=True),
+        sa.Column("credit_cost", sa.Float(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(strftime('%Y-%m-%d %H:%M:%f', 'now'))"),
+            nullable=False,
+        ),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_upscale_jobs_image_id", "upscale_jobs", ["image_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_upscale_jobs_image_id", table_name="upscale_jobs")
+    op.drop_table("upscale_jobs")
@@ -0,0 +1,41 @@
+"""Partial indexes for the run-less and unrated image listings
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-15 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # As in 0006, the WHERE clauses mirror the filters list_images renders
+    op.create_index(
+        "ix_images_created_ok",
+        "images",
+        [sa.text("created_at DESC")],
+        sqlite_where=sa.text("is_failed IS 0"),
+    )
+    op.create_index(
+        "ix_images_unrated_created_ok",
+        "images",
+        [sa.text("created_at DESC")],
+        sqlite_where=sa.text("score_overall IS NULL AND is_failed IS 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_images_unrated_created_ok", table_name="images")
+    op.drop_index("ix_images_created_ok", table_name="images")
@@ -0,0 +1,41 @@
+"""Make jobs.config_json and the configs raw_* columns valid JSON
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-15 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JSON_COLUMNS = (
+    ("jobs", "config_json"),
+    ("configs", "raw_payload_json"),
+    ("configs", "raw_response_json"),
+)
+
+
+def upgrade() -> None:
+    # These columns are now mapped as JSON. As with images.flaws in 0009, SQLite
+    # keeps the TEXT storage; only values that would fail to decode need fixing,
+    # and they are kept as JSON strings rather than dropped.
+    for table, column in JSON_COLUMNS:
+        op.execute(
+            f"UPDATE {table} SET {column} = json_quote({column}) "
+            f"WHERE {column} IS NOT NULL AND NOT json_valid({column})"
+        )
+
+
+def downgrade() -> None:
+    pass
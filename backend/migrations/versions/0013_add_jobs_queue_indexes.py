@@ -0,0 +1,29 @@
+"""Index jobs by status and by run for the queue endpoints
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-15 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_jobs_status_created", "jobs", ["status", "created_at"])
+    op.create_index("ix_jobs_run_status_created", "jobs", ["run_id", "status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_run_status_created", table_name="jobs")
+    op.drop_index("ix_jobs_status_created", table_name="jobs")
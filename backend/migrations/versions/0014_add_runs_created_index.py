@@ -0,0 +1,27 @@
+"""Index runs by creation time for keyset pagination
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-15 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0014"
+down_revision: Union[str, None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_runs_created_id", "runs", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_runs_created_id", table_name="runs")
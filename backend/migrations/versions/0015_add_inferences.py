@@ -0,0 +1,57 @@
+"""Store each inference's raw request and response once, in an inferences table
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-15 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0015"
+down_revision: Union[str, None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inferences",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("run_id", sa.String(36), sa.ForeignKey("runs.id"), nullable=False),
+        sa.Column("inf_id", sa.String(100), nullable=True),
+        sa.Column("raw_payload_json", sa.JSON(), nullable=True),
+        sa.Column("raw_response_json", sa.JSON(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(strftime('%Y-%m-%d %H:%M:%f', 'now'))"),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_inferences_run_id", "inferences", ["run_id"])
+
+    # Existing configs keep their own raw_* copies; only new generations link an inference
+    with op.batch_alter_table("configs") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "inference_id",
+                sa.Integer(),
+                sa.ForeignKey("inferences.id", name="fk_configs_inference_id"),
+                nullable=True,
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("configs") as batch_op:
+        batch_op.drop_constraint("fk_configs_inference_id", type_="foreignkey")
+        batch_op.drop_column("inference_id")
+    op.drop_index("ix_inferences_run_id", table_name="inferences")
+    op.drop_table("inferences")
@@ -0,0 +1,31 @@
+"""Covering index for the per-run image stats aggregate
+
+Remember to bump SCHEMA_VERSION in db/database.py alongside this revision.
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0016"
+down_revision: Union[str, None] = "0015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_images_run_score_upscale",
+        "images",
+        ["run_id", "score_overall", "upscale_url", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_images_run_score_upscale", table_name="images")
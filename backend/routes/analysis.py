@@ -1,98 +1,200 @@
 """Analysis routes for exporting data and cross-run insights."""
 import csv
 import io
+import orjson
+from itertools import islice
+from operator import itemgetter
+from typing import Iterator, List, Sequence
 from fastapi import APIRouter, Depends, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import RowMapping, String, Text, case, desc, func, select, type_coerce
 
 from db import get_db
 from db.models import Image, Run, Config
+from services.cache import response_cache
 
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 
 
+# Cache keys; every image write (score, upscale, generation, run deletion) invalidates both
+ANALYSIS_ROWS_CACHE_KEY = "analysis:rows"
+ANALYSIS_TABLE_CACHE_KEY = "analysis:table"
+
+
+def _credit_cost_column():
+    """Credit cost, reported as 0 for images without a config row."""
+    return case((Config.id.is_(None), 0), else_=Config.credit_cost).label("credit_cost")
+
+
+def _use_again_column():
+    """use_again as its stored string, skipping per-row Enum construction."""
+    return type_coerce(Image.use_again, String).label("use_again")
+
+
+def _analysis_statement():
+    """Core select of every column the CSV export and the table need, in display order."""
+    return (
+        select(
+            Run.id.label("run_id"),
+            Run.batch_number.label("batch"),
+            Run.name.label("run_name"),
+            Image.created_at_iso.label("created_at"),
+            Run.model_id,
+            Run.prompt,
+            Run.negative_prompt,
+            Config.steps,
+            Config.scale,
+            Config.width,
+            Config.height,
+            Config.seed,
+            Config.scheduler,
+            Image.score_overall,
+            Image.score_facial_detail_realism,
+            Image.score_body_proportions,
+            Image.score_complexity_artistry,
+            Image.score_composition_framing,
+            Image.score_lighting_color,
+            Image.score_resolution_clarity,
+            Image.score_style_consistency,
+            Image.score_prompt_adherence,
+            Image.score_artifacts,
+            _use_again_column(),
+            Image.curation_status,
+            Image.id.label("image_id"),
+            Image.file_path,
+            Image.upscale_url,
+            _credit_cost_column(),
+            # The CSV gets the JSON text, minified by SQLite so older rows written
+            # with spaced separators match newer ones; the table gets the decoded list
+            type_coerce(func.json(Image.flaws), Text).label("flaws"),
+            Image.flaws.label("flaws_list"),
+            Image.is_failed,
+        )
+        .select_from(Image)
+        .join(Run, Image.run_id == Run.id)
+        .outerjoin(Config, Image.id == Config.image_id)
+        .order_by(desc(Run.batch_number), desc(Image.created_at))
+    )
+
+
+def _analysis_rows(db: Session) -> Sequence[RowMapping]:
+    """
+    Return every image joined with its run and config, shared by /csv and /table.
+
+    The rows are cached until the next image write, so whichever endpoint is
+    called second serializes them without touching the database.
+    """
+    rows = response_cache.get(ANALYSIS_ROWS_CACHE_KEY)
+    if rows is None:
+        generation = response_cache.generation
+        rows = db.execute(_analysis_statement()).mappings().all()
+        response_cache.set(ANALYSIS_ROWS_CACHE_KEY, rows, generation)
+    return rows
+
+
+# Rows written per streamed CSV chunk
+CSV_CHUNK_ROWS = 1000
+
+CSV_FIELDNAMES = [
+    "run_id", "batch", "run_name", "created_at", "model_id",
+    "prompt", "negative_prompt", "steps", "scale", "width",
+    "height", "seed", "scheduler",
+    "score_overall",
+    "score_facial_detail_realism",
+    "score_body_proportions",
+    "score_complexity_artistry",
+    "score_composition_framing",
+    "score_lighting_color",
+    "score_resolution_clarity",
+    "score_style_consistency",
+    "score_prompt_adherence",
+    "score_artifacts",
+    "use_again",
+    "curation_status",
+    "image_id", "file_path", "upscale_url", "credit_cost",
+    "flaws"
+]
+# Picks one analysis row's CSV cells in order; the csv module writes NULLs as empty cells
+_csv_row = itemgetter(*CSV_FIELDNAMES)
+
+
+def _iter_csv_export(rows: Sequence[RowMapping]) -> Iterator[str]:
+    """Stream the export as CSV text, one chunk per CSV_CHUNK_ROWS rows."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_FIELDNAMES)
+
+    csv_rows = map(_csv_row, rows)
+    while chunk := list(islice(csv_rows, CSV_CHUNK_ROWS)):
+        writer.writerows(chunk)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+
+    # Only the header is left unsent when the export has no rows
+    if output.tell():
+        yield output.getvalue()
+
+
 @router.get("/csv")
 async def export_csv(db: Session = Depends(get_db)):
     """
     Export all rated and unrated images with their configurations and scores as a CSV.
     Useful for cross-run analysis in Excel or other tools.
+
+    Rows come from the shared analysis cache and are written out in chunks.
     """
-    # Join Image, Run, and Config
-    query = (
-        db.query(Image, Run, Config)
-        .join(Run, Image.run_id == Run.id)
-        .outerjoin(Config, Image.id == Config.image_id)
-        .order_by(desc(Run.batch_number), desc(Image.created_at))
-    )
-    
-    results = query.all()
-    
-    # Define CSV columns
-    fieldnames = [
-        "run_id", "batch", "run_name", "created_at", "model_id",
-        "prompt", "negative_prompt", "steps", "scale", "width",
-        "height", "seed", "scheduler",
-        "score_overall",
-        "score_facial_detail_realism",
-        "score_body_proportions",
-        "score_complexity_artistry",
-        "score_composition_framing",
-        "score_lighting_color",
-        "score_resolution_clarity",
-        "score_style_consistency",
-        "score_prompt_adherence",
-        "score_artifacts",
-        "use_again",
-        "curation_status",
-        "image_id", "file_path", "upscale_url", "credit_cost",
-        "flaws"
-    ]
-    
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for image, run, config in results:
-        writer.writerow({
-            "run_id": run.id,
-            "batch": run.batch_number,
-            "run_name": run.name,
-            "created_at": image.created_at.isoformat(),
-            "model_id": run.model_id,
-            "prompt": run.prompt,
-            "negative_prompt": run.negative_prompt,
-            "steps": config.steps if config else "",
-            "scale": config.scale if config else "",
-            "width": config.width if config else "",
-            "height": config.height if config else "",
-            "seed": config.seed if config else "",
-            "scheduler": config.scheduler if config else "",
-            "score_overall": image.score_overall if image.score_overall is not None else "",
-            "score_facial_detail_realism": image.score_facial_detail_realism if image.score_facial_detail_realism is not None else "",
-            "score_body_proportions": image.score_body_proportions if image.score_body_proportions is not None else "",
-            "score_complexity_artistry": image.score_complexity_artistry if image.score_complexity_artistry is not None else "",
-            "score_composition_framing": image.score_composition_framing if image.score_composition_framing is not None else "",
-            "score_lighting_color": image.score_lighting_color if image.score_lighting_color is not None else "",
-            "score_resolution_clarity": image.score_resolution_clarity if image.score_resolution_clarity is not None else "",
-            "score_style_consistency": image.score_style_consistency if image.score_style_consistency is not None else "",
-            "score_prompt_adherence": image.score_prompt_adherence if image.score_prompt_adherence is not None else "",
-            "score_artifacts": image.score_artifacts if image.score_artifacts is not None else "",
-            "use_again": image.use_again.value if image.use_again else "",
-            "curation_status": image.curation_status if image.curation_status else "",
-            "image_id": image.id,
-            "file_path": image.file_path,
-            "upscale_url": image.upscale_url,
-            "credit_cost": config.credit_cost if config else 0,
-            "flaws": image.flaws if image.flaws else "",
-        })
-    
-    response = StreamingResponse(
-        iter([output.getvalue()]),
+    return StreamingResponse(
+        _iter_csv_export(_analysis_rows(db)),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=experiments_export.csv"}
     )
-    return response
+
+
+# (response key, selected column label) pairs for the nested table objects
+TABLE_CONFIG_FIELDS = ("steps", "scale", "width", "height", "scheduler", "seed", "credit_cost")
+TABLE_SCORE_FIELDS = (
+    ("overall", "score_overall"),
+    ("facial_detail_realism", "score_facial_detail_realism"),
+    ("body_proportions", "score_body_proportions"),
+    ("complexity_artistry", "score_complexity_artistry"),
+    ("composition_framing", "score_composition_framing"),
+    ("lighting_color", "score_lighting_color"),
+    ("resolution_clarity", "score_resolution_clarity"),
+    ("style_consistency", "score_style_consistency"),
+    ("prompt_adherence", "score_prompt_adherence"),
+    ("artifacts", "score_artifacts"),
+    ("use_again", "use_again"),
+    ("flaws", "flaws_list"),
+    ("curation_status", "curation_status"),
+)
+
+
+def _table_row(row: RowMapping) -> dict:
+    """Shape one analysis row into the analysis table's nested JSON object."""
+    return {
+        "id": row["image_id"],
+        "run_id": row["run_id"],
+        "batch": row["batch"],
+        "run_name": row["run_name"],
+        "created_at": row["created_at"],
+        "prompt": row["prompt"],
+        "model_id": row["model_id"],
+        "config": {name: row[name] for name in TABLE_CONFIG_FIELDS},
+        "scores": {key: row[column] for key, column in TABLE_SCORE_FIELDS},
+        "image": {
+            "file_path": row["file_path"],
+            "upscale_url": row["upscale_url"],
+            "is_rated": row["score_overall"] is not None,
+            "is_failed": row["is_failed"],
+        },
+    }
+
+
+def _build_analysis_table(db: Session) -> List[dict]:
+    """Flatten every image with its run info and config into table rows."""
+    return list(map(_table_row, _analysis_rows(db)))
 
 
 @router.get("/table")
@@ -100,56 +202,14 @@ async def get_analysis_table(db: Session = Depends(get_db)):
     """
     Returns a flat list of all images with their run info and config.
     Used for the frontend analysis table view.
+
+    The rendered JSON is cached until the next image write (score, upscale,
+    generation, run deletion) or for at most the cache's max age.
     """
-    query = (
-        db.query(Image, Run, Config)
-        .join(Run, Image.run_id == Run.id)
-        .outerjoin(Config, Image.id == Config.image_id)
-        .order_by(desc(Run.batch_number), desc(Image.created_at))
-    )
-    
-    results = query.all()
-    
-    data = []
-    for image, run, config in results:
-        data.append({
-            "id": image.id,
-            "run_id": run.id,
-            "batch": run.batch_number,
-            "run_name": run.name,
-            "created_at": image.created_at.isoformat(),
-            "prompt": run.prompt,
-            "model_id": run.model_id,
-            "config": {
-                "steps": config.steps if config else None,
-                "scale": config.scale if config else None,
-                "width": config.width if config else None,
-                "height": config.height if config else None,
-                "scheduler": config.scheduler if config else None,
-                "seed": config.seed if config else None,
-                "credit_cost": config.credit_cost if config else 0,
-            },
-            "scores": {
-                "overall": image.score_overall,
-                "facial_detail_realism": image.score_facial_detail_realism,
-                "body_proportions": image.score_body_proportions,
-                "complexity_artistry": image.score_complexity_artistry,
-                "composition_framing": image.score_composition_framing,
-                "lighting_color": image.score_lighting_color,
-                "resolution_clarity": image.score_resolution_clarity,
-                "style_consistency": image.score_style_consistency,
-                "prompt_adherence": image.score_prompt_adherence,
-                "artifacts": image.score_artifacts,
-                "use_again": image.use_again.value if image.use_again else None,
-                "flaws": image.flaws,
-                "curation_status": image.curation_status
-            },
-            "image": {
-                "file_path": image.file_path,
-                "upscale_url": image.upscale_url,
-                "is_rated": image.score_overall is not None,
-                "is_failed": image.is_failed,
-            }
-        })
-        
-    return data
+    body = response_cache.get(ANALYSIS_TABLE_CACHE_KEY)
+    if body is None:
+        generation = response_cache.generation
+        body = orjson.dumps(_build_analysis_table(db))
+        response_cache.set(ANALYSIS_TABLE_CACHE_KEY, body, generation)
+
+    return Response(content=body, media_type="application/json")
@@ -1,17 +1,20 @@
 """Routes for handling asset uploads (init images)."""
+import hashlib
 import os
-import uuid
-import shutil
 from pathlib import Path
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
 
 from db import get_db
-from db.models import Asset
+from db.models import Asset, generate_uuid
 from config import get_settings
 
 router = APIRouter(prefix="/api/assets", tags=["assets"])
 
+# Uploads are copied in 1 MiB chunks (shutil's default is 64 KiB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
 @router.post("")
 async def upload_asset(
     file: UploadFile = File(...),
@@ -25,22 +28,26 @@ async def upload_asset(
     assets_dir.mkdir(parents=True, exist_ok=True)
     
     # Generate unique filename
-    asset_id = str(uuid.uuid4())
+    asset_id = generate_uuid()
     extension = file.filename.split('.')[-1] if '.' in file.filename else 'png'
     filename = f"{asset_id}.{extension}"
     file_path = assets_dir / filename
     
     try:
-        # Save file locally
+        # Save file locally, hashing each chunk on the way through
+        digest = hashlib.sha256()
         with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                buffer.write(chunk)
             
         # Create DB record
         asset = Asset(
             id=asset_id,
             original_filename=file.filename,
             mime_type=file.content_type,
-            file_path=str(file_path)
+            file_path=str(file_path),
+            sha256=digest.hexdigest(),
         )
         db.add(asset)
         db.commit()
@@ -1,84 +1,222 @@
 """Image routes for viewing, scoring, and upscaling images."""
-import json
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+import hashlib
+import logging
+import orjson
+from operator import attrgetter
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, String, case, func, select, tuple_, type_coerce, update
+from sqlalchemy.orm import Session, joinedload
+from typing import Iterator, Optional
 
-from db import get_db
-from db.models import Image, Config, Run
+from db import SessionLocal, get_db
+from db.models import Image, Config, JobStatus, UpscaleJob, utc_now
 from schemas import UpscaleRequest, ScoreRequest
-from services.sinkin import sinkin_service
+from services.cache import response_cache
+from services.pagination import decode_cursor, encode_cursor
+from services.sinkin import get_sinkin_service
 
 router = APIRouter(prefix="/api/images", tags=["images"])
+logger = logging.getLogger(__name__)
+
+
+# Score columns in response order, read from a row with a single attrgetter call
+_SCORE_ATTRS = (
+    "score_overall",
+    "score_facial_detail_realism",
+    "score_body_proportions",
+    "score_complexity_artistry",
+    "score_composition_framing",
+    "score_lighting_color",
+    "score_resolution_clarity",
+    "score_style_consistency",
+    "score_prompt_adherence",
+    "score_artifacts",
+)
+_get_scores = attrgetter(*_SCORE_ATTRS)
+_SCORE_KEYS = ("overall",) + tuple(attr.removeprefix("score_") for attr in _SCORE_ATTRS[1:])
+# get_image has always reported the overall score under its column name
+_DETAIL_SCORE_KEYS = ("score_overall",) + _SCORE_KEYS[1:]
+
+
+def _weak_etag(*parts) -> str:
+    """Build a weak ETag from the values that determine a response body."""
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _is_not_modified(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already names etag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def _image_list_item():
+    """One gallery entry as a JSON object built by SQLite's json_object()."""
+    return func.json_object(
+        "id", Image.id,
+        "run_id", Image.run_id,
+        "file_path", Image.file_path,
+        "upscale_url", Image.upscale_url,
+        "inf_id", Image.inf_id,
+        "created_at", Image.created_at_iso,
+        "score_overall", Image.score_overall,
+        "is_rated", func.json(case((Image.score_overall.is_not(None), "true"), else_="false")),
+        "scores", func.json_object(
+            "score_overall", Image.score_overall,
+            "facial_detail_realism", Image.score_facial_detail_realism,
+            "body_proportions", Image.score_body_proportions,
+            "complexity_artistry", Image.score_complexity_artistry,
+            "composition_framing", Image.score_composition_framing,
+            "lighting_color", Image.score_lighting_color,
+            "resolution_clarity", Image.score_resolution_clarity,
+            "style_consistency", Image.score_style_consistency,
+            "prompt_adherence", Image.score_prompt_adherence,
+            "artifacts", Image.score_artifacts,
+        ),
+        "curation_status", Image.curation_status,
+        "use_again", type_coerce(Image.use_again, String),
+        "flaws", func.json(Image.flaws),
+        "config", func.json_object(
+            "steps", Config.steps,
+            "scale", Config.scale,
+            "width", Config.width,
+            "height", Config.height,
+            "seed", Config.seed,
+            "scheduler", Config.scheduler,
+            "credit_cost", Config.credit_cost,
+        ),
+    )
+
+
+# Rendered gallery pages, keyed by their query parameters; image writes invalidate them
+IMAGE_LIST_CACHE_KEY = "images:list:{run_id}:{unrated_only}:{limit}:{offset}:{after}"
+
+# Clients that send this Accept type get the listing as streamed NDJSON
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_CHUNK_ROWS = 200
+
+
+# created_at as stored, so cursor comparisons match the column (and its indexes) exactly
+_CREATED_AT_RAW = type_coerce(Image.created_at, String)
+
+
+def _iter_image_list_ndjson(header: bytes, stmt: Select) -> Iterator[bytes]:
+    """
+    Yield the header line, then one line per gallery entry, a chunk per fetched batch.
+
+    Opens its own session because the response body is produced after the
+    request's dependencies have been torn down.
+    """
+    yield header + b"\n"
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=NDJSON_CHUNK_ROWS)).scalars()
+        for items in result.partitions():
+            yield "".join(f"{item}\n" for item in items).encode()
 
 
 @router.get("")
 async def list_images(
+    request: Request,
     run_id: Optional[str] = Query(None, description="Filter by run ID"),
     unrated_only: bool = Query(False, description="Only show unrated images"),
     limit: int = Query(50, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Deprecated: page with `after` instead"),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
 ):
     """
     Get paginated list of images with optional filters.
+
+    Pages are ordered newest first. Each page returns a `next_cursor`; passing
+    it back as `after` continues right after that page's last image via an
+    index range scan, however deep the page. `offset` still works but is
+    ignored when `after` is given.
+
+    Responses carry a weak ETag derived from the filtered rows' latest
+    updated_at and count; a matching If-None-Match gets a bodiless 304.
+    Each entry is rendered to JSON by SQLite, so no ORM objects are built,
+    and the rendered page is cached until the next image write.
+
+    With `Accept: application/x-ndjson` the page is streamed instead: a
+    first line with total/limit/offset/next_cursor, then one image object per line.
     """
-    query = db.query(Image)
+    stream = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    cursor = decode_cursor(after) if after else None
+    cache_key = IMAGE_LIST_CACHE_KEY.format(
+        run_id=run_id, unrated_only=unrated_only, limit=limit, offset=offset, after=after
+    )
+    cached = None if stream else response_cache.get(cache_key)
+    if cached is not None:
+        etag, body = cached
+        if _is_not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+    generation = response_cache.generation
     
     # Exclude failed images from gallery listings
-    query = query.filter(Image.is_failed.is_(False))
+    filters = [Image.is_failed.is_(False)]
     
     if run_id:
-        query = query.filter(Image.run_id == run_id)
+        filters.append(Image.run_id == run_id)
     
     if unrated_only:
-        query = query.filter(Image.score_overall.is_(None))
+        filters.append(Image.score_overall.is_(None))
     
-    total = query.count()
-    images = query.order_by(Image.created_at.desc()).offset(offset).limit(limit).all()
+    # One aggregate both validates the client's copy and supplies the total
+    last_updated, total = db.execute(
+        select(func.max(Image.updated_at), func.count(Image.id)).where(*filters)
+    ).one()
+    etag = _weak_etag(last_updated, total, run_id, unrated_only, limit, offset, after, stream)
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
     
-    return {
-        "total": total,
-        "limit": limit,
-        "offset": offset,
-        "images": [
-            {
-                "id": img.id,
-                "run_id": img.run_id,
-                "file_path": img.file_path,
-                "upscale_url": img.upscale_url,
-                "inf_id": img.inf_id,
-                "created_at": img.created_at.isoformat(),
-                "score_overall": img.score_overall,
-                "is_rated": img.score_overall is not None,
-                "scores": {
-                    "score_overall": img.score_overall,
-                    "facial_detail_realism": img.score_facial_detail_realism,
-                    "body_proportions": img.score_body_proportions,
-                    "complexity_artistry": img.score_complexity_artistry,
-                    "composition_framing": img.score_composition_framing,
-                    "lighting_color": img.score_lighting_color,
-                    "resolution_clarity": img.score_resolution_clarity,
-                    "style_consistency": img.score_style_consistency,
-                    "prompt_adherence": img.score_prompt_adherence,
-                    "artifacts": img.score_artifacts,
-                },
-                "curation_status": img.curation_status,
-                "use_again": img.use_again.value if img.use_again else None,
-                "flaws": img.flaws,
-                "config": {
-                    "steps": img.config.steps if img.config else None,
-                    "scale": img.config.scale if img.config else None,
-                    "width": img.config.width if img.config else None,
-                    "height": img.config.height if img.config else None,
-                    "seed": img.config.seed if img.config else None,
-                    "scheduler": img.config.scheduler if img.config else None,
-                    "credit_cost": img.config.credit_cost if img.config else None,
-                }
-            }
-            for img in images
-        ],
-    }
+    # The cursor narrows the page only; total still counts every matching image
+    if cursor:
+        filters.append(tuple_(_CREATED_AT_RAW, Image.id) < cursor)
+    skip = 0 if cursor else offset
+    
+    # id breaks created_at ties (one bulk insert shares a timestamp) so cursors never skip rows
+    stmt = (
+        select(_image_list_item(), _CREATED_AT_RAW, Image.id)
+        .select_from(Image)
+        .outerjoin(Config, Image.id == Config.image_id)
+        .where(*filters)
+        .order_by(Image.created_at.desc(), Image.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    if stream:
+        # The header goes out first, so look up the page's last key ahead of the rows
+        last = db.execute(
+            stmt.with_only_columns(_CREATED_AT_RAW, Image.id).offset(skip + limit - 1).limit(1)
+        ).first()
+        header = orjson.dumps({
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "next_cursor": encode_cursor(*last) if last else None,
+        })
+        return StreamingResponse(
+            _iter_image_list_ndjson(header, stmt),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"ETag": etag},
+        )
+    
+    rows = db.execute(stmt).all()
+    next_cursor = encode_cursor(*rows[-1][1:]) if len(rows) == limit else None
+    
+    body = b"".join((
+        b'{"total":', str(total).encode(),
+        b',"limit":', str(limit).encode(),
+        b',"offset":', str(offset).encode(),
+        b',"next_cursor":', orjson.dumps(next_cursor),
+        b',"images":[', ",".join(row[0] for row in rows).encode(), b"]}",
+    ))
+    response_cache.set(cache_key, (etag, body), generation)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @router.get("/ids")
@@ -91,36 +229,46 @@ async def list_image_ids(
     """
     Fetch only the IDs for images in a run (lightweight navigation helper).
     """
-    images = (
-        db.query(Image.id)
-        .filter(Image.run_id == run_id)
-        .filter(Image.is_failed.is_(False))
+    image_ids = db.execute(
+        select(Image.id)
+        .where(Image.run_id == run_id, Image.is_failed.is_(False))
         .order_by(Image.created_at.desc())
         .offset(offset)
         .limit(limit)
-        .all()
-    )
+    ).scalars().all()
 
     return {
         "run_id": run_id,
         "limit": limit,
         "offset": offset,
-        "image_ids": [row[0] for row in images],
+        "image_ids": image_ids,
     }
 
 
 @router.get("/{image_id}")
-async def get_image(image_id: str, db: Session = Depends(get_db)):
-    """Get a single image with its config."""
-    image = db.query(Image).filter(Image.id == image_id).first()
+async def get_image(
+    image_id: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """Get a single image with its config, revalidated by an ETag over its updated_at."""
+    # Image, config and run arrive together in one LEFT OUTER JOIN query
+    image = db.execute(
+        select(Image)
+        .options(joinedload(Image.config), joinedload(Image.run))
+        .where(Image.id == image_id)
+    ).unique().scalar_one_or_none()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Get associated config
-    config = db.query(Config).filter(Config.image_id == image_id).first()
+    etag = _weak_etag(image.id, image.updated_at)
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     
-    # Get run info
-    run = db.query(Run).filter(Run.id == image.run_id).first()
+    config = image.config
+    run = image.run
     
     return {
         "id": image.id,
@@ -129,22 +277,13 @@ async def get_image(image_id: str, db: Session = Depends(get_db)):
         "upscale_url": image.upscale_url,
         "inf_id": image.inf_id,
         "is_failed": image.is_failed,
-        "created_at": image.created_at.isoformat(),
-        "scores": {
-            "score_overall": image.score_overall,
-            "facial_detail_realism": image.score_facial_detail_realism,
-            "body_proportions": image.score_body_proportions,
-            "complexity_artistry": image.score_complexity_artistry,
-            "composition_framing": image.score_composition_framing,
-            "lighting_color": image.score_lighting_color,
-            "resolution_clarity": image.score_resolution_clarity,
-            "style_consistency": image.score_style_consistency,
-            "prompt_adherence": image.score_prompt_adherence,
-            "artifacts": image.score_artifacts,
-            "use_again": image.use_again.value if image.use_again else None,
-            "curation_status": image.curation_status,
-            "flaws": image.flaws,
-        },
+        "created_at": image.created_at_iso,
+        "scores": dict(
+            zip(_DETAIL_SCORE_KEYS, _get_scores(image)),
+            use_again=image.use_again.value if image.use_again else None,
+            curation_status=image.curation_status,
+            flaws=image.flaws,
+        ),
         "config": {
             "steps": config.steps if config else None,
             "scale": config.scale if config else None,
@@ -164,36 +303,16 @@ async def get_image(image_id: str, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/{image_id}/upscale")
-async def upscale_image(
-    image_id: str,
-    request: UpscaleRequest,
-    db: Session = Depends(get_db),
-):
-    """
-    Upscale an image using SinkIn /upscale API.
-    Updates the image record with the upscale_url.
-    """
-    # Get the image
-    image = db.query(Image).filter(Image.id == image_id).first()
-    if not image:
-        raise HTTPException(status_code=404, detail="Image not found")
-    
-    # Need inf_id and a URL to upscale
-    if not image.inf_id:
-        raise HTTPException(status_code=400, detail="Image has no inf_id - cannot upscale")
-    
-    # Get the config to find the original image URL from raw_response
-    config = db.query(Config).filter(Config.image_id == image_id).first()
-    if not config or not config.raw_response_json:
+def _source_url_from_config(image: Image, config: Optional[Config]) -> str:
+    """Recover a legacy image's original SinkIn URL from its stored raw generation response."""
+    raw_response = None
+    if config:
+        raw_response = config.inference.raw_response_json if config.inference else config.raw_response_json
+    if not raw_response:
         raise HTTPException(status_code=400, detail="Image has no config data - cannot determine original URL")
     
-    # Parse raw response to get the correct original image URL
+    # The stored raw response lists the original image URLs
     try:
-        if not config.raw_response_json:
-             raise HTTPException(status_code=400, detail="Image has no raw response data - cannot upscale")
-             
-        raw_response = json.loads(config.raw_response_json)
         image_urls = raw_response.get("images", [])
         
         if not image_urls:
@@ -204,116 +323,206 @@ async def upscale_image(
         if index >= len(image_urls):
             index = 0 # Fallback
             
-        image_url = image_urls[index]
-    except (json.JSONDecodeError, TypeError):
+        return image_urls[index]
+    except (AttributeError, TypeError):
         raise HTTPException(status_code=400, detail="Invalid generation record data")
-    
+
+
+def _upscale_job_status(job: UpscaleJob) -> dict:
+    """Shape an upscale job row for the upscale endpoints."""
+    return {
+        "job_id": job.id,
+        "image_id": job.image_id,
+        "status": job.status.value,
+        "type": job.upscale_type,
+        "upscale_url": job.upscale_url,
+        "credit_cost": job.credit_cost,
+        "error_message": job.error_message,
+    }
+
+
+def _run_upscale_job(job_id: int, inf_id: str, image_url: str) -> None:
+    """
+    Call SinkIn /upscale for a queued job and store the result.
+
+    Runs as a background task after the 202 response has been sent, so it
+    opens its own session instead of reusing the request's.
+    """
+    db = SessionLocal()
     try:
-        # Call SinkIn upscale API
-        result = sinkin_service.upscale(
-            inf_id=image.inf_id,
-            image_url=image_url,
-            upscale_type=request.type.value,
-            scale=request.scale,
-            strength=request.strength,
-        )
-        
-        # Check for error
-        if result.get("error_code", 0) != 0:
-            raise HTTPException(
-                status_code=500,
-                detail=result.get("message", "Upscale failed")
+        job = db.get(UpscaleJob, job_id)
+        if not job or job.status != JobStatus.queued:
+            return
+        job.status = JobStatus.running
+        db.commit()
+
+        try:
+            result = get_sinkin_service().upscale(
+                inf_id=inf_id,
+                image_url=image_url,
+                upscale_type=job.upscale_type,
+                scale=job.scale,
+                strength=job.strength,
             )
-        
-        # Get upscaled image URL
+        except ValueError as e:
+            result = {"error_code": -1, "message": str(e)}
+
+        if result.get("error_code", 0) != 0:
+            job.status = JobStatus.failed
+            job.error_message = result.get("message", "Upscale failed")
+            job.completed_at = utc_now()
+            db.commit()
+            logger.warning("❌ Upscale job %s failed: %s", job_id, job.error_message)
+            return
+
         upscale_url = result.get("output")
         credit_cost = result.get("credit_cost", 0)
-        
+
         # Update image record
-        image.upscale_url = upscale_url
-        
-        # Update config with upscale credit cost (add to existing)
-        if config:
-            existing_cost = config.credit_cost or 0
-            config.credit_cost = existing_cost + credit_cost
-        
+        db.execute(update(Image).where(Image.id == job.image_id).values(upscale_url=upscale_url))
+
+        # Add the upscale credit cost in SQL, so concurrent upscales never overwrite each other
+        db.execute(
+            update(Config)
+            .where(Config.image_id == job.image_id)
+            .values(credit_cost=func.coalesce(Config.credit_cost, 0) + credit_cost)
+        )
+
+        job.status = JobStatus.completed
+        job.upscale_url = upscale_url
+        job.credit_cost = credit_cost
+        job.completed_at = utc_now()
         db.commit()
-        
-        return {
-            "success": True,
-            "upscale_url": upscale_url,
-            "credit_cost": credit_cost,
-            "type": request.type.value,
-        }
-        
-    except ValueError as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        response_cache.invalidate()
+    except Exception as e:
+        db.rollback()
+        logger.exception("❌ Upscale job %s crashed", job_id)
+        db.execute(
+            update(UpscaleJob)
+            .where(UpscaleJob.id == job_id)
+            .values(status=JobStatus.failed, error_message=str(e), completed_at=utc_now())
+        )
+        db.commit()
+    finally:
+        db.close()
 
 
-@router.post("/{image_id}/score")
-async def score_image(
+def fail_interrupted_upscale_jobs() -> None:
+    """
+    Mark upscale jobs left queued or running by a previous process as failed.
+
+    Their background tasks died with that process. They are not retried, since
+    SinkIn may already have charged for the upscale; the user can request it again.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(UpscaleJob)
+            .where(UpscaleJob.status.in_((JobStatus.queued, JobStatus.running)))
+            .values(
+                status=JobStatus.failed,
+                error_message="Interrupted by a server restart",
+                completed_at=utc_now(),
+            )
+        )
+        db.commit()
+        if result.rowcount:
+            logger.warning("⚠️ Marked %d interrupted upscale job(s) as failed", result.rowcount)
+    finally:
+        db.close()
+
+
+@router.post("/{image_id}/upscale", status_code=202)
+async def upscale_image(
     image_id: str,
-    request: ScoreRequest,
+    request: UpscaleRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     """
-    Update scores for an image.
+    Queue an upscale of an image via the SinkIn /upscale API.
+
+    Responds 202 with the job id straight away; the SinkIn call and the
+    image's upscale_url update run in a background task. Poll
+    GET /api/images/{image_id}/upscale/{job_id} (or the image itself)
+    for the result.
     """
+    # Get the image
     image = db.query(Image).filter(Image.id == image_id).first()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Update only provided scores
-    if request.score_overall is not None:
-        image.score_overall = request.score_overall
-    if request.score_facial_detail_realism is not None:
-        image.score_facial_detail_realism = request.score_facial_detail_realism
-    if request.score_body_proportions is not None:
-        image.score_body_proportions = request.score_body_proportions
-    if request.score_complexity_artistry is not None:
-        image.score_complexity_artistry = request.score_complexity_artistry
-    if request.score_composition_framing is not None:
-        image.score_composition_framing = request.score_composition_framing
-    if request.score_lighting_color is not None:
-        image.score_lighting_color = request.score_lighting_color
-    if request.score_resolution_clarity is not None:
-        image.score_resolution_clarity = request.score_resolution_clarity
-    if request.score_style_consistency is not None:
-        image.score_style_consistency = request.score_style_consistency
-    if request.score_prompt_adherence is not None:
-        image.score_prompt_adherence = request.score_prompt_adherence
-    if request.score_artifacts is not None:
-        image.score_artifacts = request.score_artifacts
-    if request.use_again is not None:
-        from db.models import UseAgain
-        image.use_again = UseAgain(request.use_again)
-    if request.is_failed is not None:
-        image.is_failed = request.is_failed
-    if request.flaws is not None:
-        # Store as JSON string if list, else string
-        image.flaws = json.dumps(request.flaws) if isinstance(request.flaws, list) else request.flaws
-    if request.curation_status is not None:
-        image.curation_status = request.curation_status
+    # Need inf_id and a URL to upscale
+    if not image.inf_id:
+        raise HTTPException(status_code=400, detail="Image has no inf_id - cannot upscale")
     
+    # Rows created before source_url existed fall back to the stored generation response
+    image_url = image.source_url
+    if not image_url:
+        config = db.query(Config).filter(Config.image_id == image_id).first()
+        image_url = _source_url_from_config(image, config)
+
+    job = UpscaleJob(
+        image_id=image_id,
+        upscale_type=request.type.value,
+        scale=request.scale,
+        strength=request.strength,
+    )
+    db.add(job)
     db.commit()
+
+    background_tasks.add_task(_run_upscale_job, job.id, image.inf_id, image_url)
+
+    return {"status": "pending", "job_id": job.id, "image_id": image_id}
+
+
+@router.get("/{image_id}/upscale/{job_id}")
+async def get_upscale_job(image_id: str, job_id: int, db: Session = Depends(get_db)):
+    """Get the status of a queued upscale, with its upscale_url once completed."""
+    job = db.get(UpscaleJob, job_id)
+    if not job or job.image_id != image_id:
+        raise HTTPException(status_code=404, detail="Upscale job not found")
+    return _upscale_job_status(job)
+
+
+@router.post("/{image_id}/score")
+async def score_image(
+    image_id: str,
+    request: ScoreRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Update scores for an image.
+
+    Only the fields sent with a value are written, in a single
+    UPDATE ... RETURNING statement; there is no SELECT beforehand.
+    """
+    # Field names match Image columns, and the JSON/Enum column types accept the
+    # validated list and string values as-is, so no per-field coercion is needed
+    updates = request.model_dump(exclude_unset=True, exclude_none=True)
+    if updates:
+        stmt = update(Image).where(Image.id == image_id).values(**updates).returning(Image)
+    else:
+        stmt = select(Image).where(Image.id == image_id)
+    image = db.execute(stmt).scalar_one_or_none()
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
     
-    return {
+    # Built before committing, which would expire the returned row
+    result = {
         "success": True,
         "image_id": image_id,
-        "scores": {
-            "overall": image.score_overall,
-            "facial_detail_realism": image.score_facial_detail_realism,
-            "body_proportions": image.score_body_proportions,
-            "complexity_artistry": image.score_complexity_artistry,
-            "composition_framing": image.score_composition_framing,
-            "lighting_color": image.score_lighting_color,
-            "resolution_clarity": image.score_resolution_clarity,
-            "style_consistency": image.score_style_consistency,
-            "prompt_adherence": image.score_prompt_adherence,
-            "artifacts": image.score_artifacts,
-            "use_again": image.use_again.value if image.use_again else None,
-            "flaws": image.flaws,
-            "curation_status": image.curation_status,
-        },
+        "scores": dict(
+            zip(_SCORE_KEYS, _get_scores(image)),
+            use_again=image.use_again.value if image.use_again else None,
+            flaws=image.flaws,
+            curation_status=image.curation_status,
+        ),
         "is_failed": image.is_failed,
     }
+    
+    if updates:
+        db.commit()
+        response_cache.invalidate()
+    
+    return result
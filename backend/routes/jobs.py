@@ -1,40 +1,142 @@
 """Job processing routes for SinkIn inference."""
-import json
+import errno
 import logging
+import mmap
 import os
-import uuid
 import requests
-from datetime import datetime
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from requests.adapters import HTTPAdapter
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session, joinedload
+from urllib3.util.retry import Retry
 
-from db import get_db
-from db.models import Job, JobStatus, Image, Config, Run
+from db import get_db, bulk_insert
+from db.models import Job, JobStatus, Config, Image, Inference, Run, generate_uuid, utc_now
 from schemas import InferenceResult, JobRunRequest
-from services.sinkin import sinkin_service
+from services.cache import response_cache
+from services.sinkin import InvalidInferenceParams, get_sinkin_service
 from config import get_settings
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 logger = logging.getLogger(__name__)
 
+# Generated images are saved here; created once at import instead of per download
+IMAGES_DIR = Path(get_settings().images_dir)
+IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+DIRECT_IO = get_settings().direct_io_downloads
+
+
+# Upper bound on concurrent downloads per job; a job's batch is usually 1-4 images
+DOWNLOAD_WORKERS = 8
+
+# Downloads are copied to disk in chunks of this size rather than buffered whole
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# With direct_io_downloads on, images at least this large skip the page cache
+DIRECT_IO_MIN_BYTES = 1024 * 1024
+# O_DIRECT writes must be a multiple of the device block size; 4 KiB covers common disks
+DIRECT_IO_BLOCK_SIZE = 4096
+
+# Kept-alive connections per host; room for two jobs downloading at once
+DOWNLOAD_POOL_SIZE = 16
+# Connection errors and gateway hiccups are retried before a download counts as failed
+DOWNLOAD_RETRIES = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+
+# Shared by every download so connections to the image host stay alive across images and jobs
+_download_session = requests.Session()
+_download_adapter = HTTPAdapter(
+    pool_connections=DOWNLOAD_POOL_SIZE,
+    pool_maxsize=DOWNLOAD_POOL_SIZE,
+    max_retries=DOWNLOAD_RETRIES,
+)
+_download_session.mount("https://", _download_adapter)
+_download_session.mount("http://", _download_adapter)
+
+# Status filter values accepted by list_jobs
+_JOB_STATUS_BY_VALUE = {status.value: status for status in JobStatus}
+
+
+def _open_direct(file_path: Path) -> Optional[int]:
+    """Open file_path for O_DIRECT writing, or None where the OS or filesystem refuses it."""
+    if not hasattr(os, "O_DIRECT"):
+        return None
+    try:
+        return os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+    except OSError as e:
+        # tmpfs and some network filesystems reject O_DIRECT at open time
+        if e.errno in (errno.EINVAL, errno.EOPNOTSUPP):
+            return None
+        raise
+
+
+def _copy_direct(source, fd: int) -> None:
+    """
+    Copy a response body into an O_DIRECT file descriptor.
+
+    O_DIRECT needs block-aligned buffers and lengths, so data is staged in a
+    page-aligned anonymous mmap; the padded final block is truncated off.
+    """
+    size = 0
+    with mmap.mmap(-1, DOWNLOAD_CHUNK_SIZE) as buffer, memoryview(buffer) as view:
+        while True:
+            filled = 0
+            while filled < DOWNLOAD_CHUNK_SIZE:
+                read = source.readinto(view[filled:])
+                if not read:
+                    break
+                filled += read
+            if not filled:
+                break
+            aligned = -(-filled // DIRECT_IO_BLOCK_SIZE) * DIRECT_IO_BLOCK_SIZE
+            os.write(fd, view[:aligned])
+            size += filled
+            if filled < DOWNLOAD_CHUNK_SIZE:
+                break
+    os.ftruncate(fd, size)
+
 
 def download_image(url: str, save_dir: Path, filename: str) -> str:
     """Download image from URL and save locally."""
-    save_dir.mkdir(parents=True, exist_ok=True)
     file_path = save_dir / filename
     
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+        with _download_session.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            # Reading .raw skips requests' decoding unless asked for explicitly
+            response.raw.decode_content = True
+            
+            fd = None
+            if DIRECT_IO and int(response.headers.get("Content-Length", 0)) >= DIRECT_IO_MIN_BYTES:
+                fd = _open_direct(file_path)
+            if fd is not None:
+                try:
+                    _copy_direct(response.raw, fd)
+                finally:
+                    os.close(fd)
+            else:
+                with open(file_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, DOWNLOAD_CHUNK_SIZE)
         return str(file_path)
     except Exception as e:
         logger.warning("🧊 Failed to download image %s | error=%s", url, str(e))
+        # Don't leave a truncated file behind
+        file_path.unlink(missing_ok=True)
         return ""
 
 
+def download_images(urls: List[str], save_dir: Path, filenames: List[str]) -> List[str]:
+    """Download several images concurrently; paths come back in the order of urls."""
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(urls), DOWNLOAD_WORKERS)) as pool:
+        return list(pool.map(download_image, urls, repeat(save_dir), filenames))
+
+
 @router.post("/run", response_model=InferenceResult)
 def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
     """
@@ -42,7 +144,6 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
     Stores generated images and their configs in the database.
     """
     logger.info("📬 Received request to run job | job=%s", request.job_id)
-    settings = get_settings()
     
     # Get the job
     job = db.query(Job).filter(Job.id == request.job_id).first()
@@ -64,16 +165,26 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
         logger.error("❓ Run missing for job | job=%s run_id=%s", job.id, job.run_id)
         raise HTTPException(status_code=404, detail="Run not found")
     
-    # Parse job config
-    try:
-        config = json.loads(job.config_json)
-    except json.JSONDecodeError:
+    # The JSON column hands back the job config already decoded
+    config = job.config_json
+    if not isinstance(config, dict):
         logger.error("⚠️ Invalid job config JSON | job=%s", job.id)
         raise HTTPException(status_code=400, detail="Invalid job config JSON")
     
-    # Update job status to running
-    job.status = JobStatus.running
+    # Claim the job: only one concurrent caller's UPDATE can still match status=queued
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == JobStatus.queued)
+        .values(status=JobStatus.running)
+    ).rowcount
     db.commit()
+    if not claimed:
+        logger.warning(
+            "⏸️ Job claimed by another worker | job=%s status=%s",
+            job.id,
+            job.status.value,
+        )
+        raise HTTPException(status_code=400, detail=f"Job is not queued (status: {job.status.value})")
     logger.info(
         "🚀 Started job | job=%s batch=%s model=%s",
         job.id,
@@ -100,7 +211,7 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
             "batch_number": run.batch_number,
             "job_id": job.id,
         }
-        payload, response = sinkin_service.inference(
+        payload, response = get_sinkin_service().inference(
             model_id=run.model_id,
             prompt=run.prompt,
             negative_prompt=run.negative_prompt,
@@ -129,7 +240,7 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
                     response.get("message"),
                 )
                 # Retry without init image
-                payload, response = sinkin_service.inference(
+                payload, response = get_sinkin_service().inference(
                     model_id=run.model_id,
                     prompt=run.prompt,
                     negative_prompt=run.negative_prompt,
@@ -151,7 +262,7 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
             if response.get("error_code", 0) != 0:
                 job.status = JobStatus.failed
                 job.error_message = response.get("message", "Unknown API error")
-                job.completed_at = datetime.utcnow()
+                job.completed_at = utc_now()
                 db.commit()
                 logger.error(
                     "💀 Generation failed | job=%s batch=%s error=%s",
@@ -169,45 +280,53 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
         inf_id = response.get("inf_id", "")
         credit_cost = response.get("credit_cost", 0)
         
-        # Set up image storage directory
-        images_dir = Path(settings.images_dir)
+        # Download the whole batch in parallel before building the rows
+        image_ids = [generate_uuid() for _ in image_urls]
+        file_paths = download_images(
+            image_urls, IMAGES_DIR, [f"{image_id}.png" for image_id in image_ids]
+        )
+        
+        # The raw request and response are stored once per call, not once per image
+        inference_id = db.execute(
+            insert(Inference).returning(Inference.id),
+            {
+                "run_id": run.id,
+                "inf_id": inf_id,
+                "raw_payload_json": payload,
+                "raw_response_json": response,
+            },
+        ).scalar_one()
+        
+        # Every image of one API call shares the same generation settings and cost share
+        shared_config = {
+            "steps": config.get("steps", 30),
+            "scale": config.get("scale", 7.5),
+            "width": config.get("width", 512),
+            "height": config.get("height", 768),
+            "seed": response.get("seed", config.get("seed", -1)),
+            "scheduler": config.get("scheduler", "DPMSolverMultistep"),
+            "image_strength": config.get("image_strength") if init_image_path else None,
+            "controlnet": config.get("controlnet"),
+            "credit_cost": credit_cost / len(image_urls) if image_urls else credit_cost,
+            "inference_id": inference_id,
+        }
         
         saved_images = []
-        for i, img_url in enumerate(image_urls):
-            # Generate unique filename
-            image_id = str(uuid.uuid4())
-            filename = f"{image_id}.png"
-            
-            # Download and save image
-            file_path = download_image(img_url, images_dir, filename)
+        image_rows = []
+        config_rows = []
+        for i, (img_url, image_id, file_path) in enumerate(zip(image_urls, image_ids, file_paths)):
+            # Collect image rows; they are inserted together after the loop
+            image_rows.append({
+                "id": image_id,
+                "run_id": run.id,
+                "file_path": file_path if file_path else None,
+                "source_url": img_url,
+                "inf_id": inf_id,
+                "batch_index": i,
+            })
             
-            # Create image record
-            image = Image(
-                id=image_id,
-                run_id=run.id,
-                file_path=file_path if file_path else None,
-                inf_id=inf_id,
-                batch_index=i,
-            )
-            db.add(image)
-            db.flush()  # Get the image ID
-            
-            # Create config record
-            image_config = Config(
-                image_id=image.id,
-                steps=config.get("steps", 30),
-                scale=config.get("scale", 7.5),
-                width=config.get("width", 512),
-                height=config.get("height", 768),
-                seed=response.get("seed", config.get("seed", -1)),
-                scheduler=config.get("scheduler", "DPMSolverMultistep"),
-                image_strength=config.get("image_strength") if init_image_path else None,
-                controlnet=config.get("controlnet"),
-                credit_cost=credit_cost / len(image_urls) if image_urls else credit_cost,
-                raw_payload_json=json.dumps(payload),
-                raw_response_json=json.dumps(response),
-            )
-            db.add(image_config)
+            # Collect the matching config row
+            config_rows.append({"image_id": image_id, **shared_config})
             
             saved_images.append(img_url)
             logger.info(
@@ -219,10 +338,15 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
                 file_path or "download_failed",
             )
         
+        # One executemany INSERT per table; images first so the configs' foreign keys resolve
+        bulk_insert(db, Image, image_rows)
+        bulk_insert(db, Config, config_rows)
+        
         # Update job status
         job.status = JobStatus.completed
-        job.completed_at = datetime.utcnow()
+        job.completed_at = utc_now()
         db.commit()
+        response_cache.invalidate()
         logger.info(
             "✅ Job completed | job=%s batch=%s images=%s credit_cost=%s",
             job.id,
@@ -238,11 +362,19 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
             credit_cost=credit_cost
         )
         
+    except InvalidInferenceParams as e:
+        # Job config SinkIn would reject; caught locally before any API call
+        job.status = JobStatus.failed
+        job.error_message = str(e)
+        job.completed_at = utc_now()
+        db.commit()
+        logger.error("⛔ Invalid job parameters | job=%s error=%s", job.id, e)
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         # API key not configured
         job.status = JobStatus.failed
         job.error_message = str(e)
-        job.completed_at = datetime.utcnow()
+        job.completed_at = utc_now()
         db.commit()
         logger.error("🔐 Missing API key | job=%s", job.id)
         raise HTTPException(status_code=500, detail=str(e))
@@ -250,7 +382,7 @@ def run_job(request: JobRunRequest, db: Session = Depends(get_db)):
         # Unexpected error
         job.status = JobStatus.failed
         job.error_message = str(e)
-        job.completed_at = datetime.utcnow()
+        job.completed_at = utc_now()
         db.commit()
         logger.exception(
             "🔥 Unexpected error during generation | job=%s batch=%s",
@@ -267,14 +399,14 @@ async def list_jobs(
     db: Session = Depends(get_db)
 ):
     """List jobs with optional filters and associated run info."""
-    query = db.query(Job)
+    # Each job's run arrives in the same JOINed query instead of a lazy SELECT per run
+    query = db.query(Job).options(joinedload(Job.run))
     
     if status:
-        try:
-            job_status = JobStatus(status)
-            query = query.filter(Job.status == job_status)
-        except ValueError:
+        job_status = _JOB_STATUS_BY_VALUE.get(status)
+        if job_status is None:
             raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+        query = query.filter(Job.status == job_status)
     
     if run_id:
         query = query.filter(Job.run_id == run_id)
@@ -291,7 +423,7 @@ async def list_jobs(
             "error_message": job.error_message,
             "run_name": job.run.name,
             "run_batch": job.run.batch_number,
-            "config": json.loads(job.config_json)
+            "config": job.config_json
         }
         for job in jobs
     ]
@@ -299,11 +431,17 @@ async def list_jobs(
 
 @router.get("/next")
 async def get_next_job(db: Session = Depends(get_db)):
-    """Get the next pending job in the queue."""
+    """
+    Get the next pending job in the queue.
+
+    This only peeks; POST /run claims the job atomically, so workers that
+    race for the same job get a 400 from all but one of those calls.
+    """
     job = (
         db.query(Job)
+        .options(joinedload(Job.run))
         .filter(Job.status == JobStatus.queued)
-        .order_by(Job.created_at.asc())
+        .order_by(Job.created_at.asc(), Job.id.asc())
         .first()
     )
     
@@ -340,7 +478,8 @@ async def cancel_all_jobs(run_id: str = None, db: Session = Depends(get_db)):
     if run_id:
         query = query.filter(Job.run_id == run_id)
     
-    count = query.delete()
+    # One DELETE statement; no Job objects are loaded to reconcile the session
+    count = query.delete(synchronize_session=False)
     db.commit()
     
     return {"success": True, "deleted_count": count}
@@ -1,16 +1,16 @@
 """Run management routes for creating and listing experiment runs."""
-import json
-import uuid
 from datetime import datetime
 from typing import List, Optional
-from itertools import product
+from itertools import islice, product
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import String, case, func, insert, tuple_, type_coerce
 
 from db import get_db
-from db.models import Run, Image, Job, JobStatus, Asset, Config
+from db.models import Run, Image, Job, JobStatus, Asset, Config, generate_uuid
+from services.cache import response_cache
+from services.pagination import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/api/runs", tags=["runs"])
 
@@ -66,41 +66,58 @@ def create_job_configs(request: RunCreateRequest) -> List[dict]:
     Generate job configurations from run parameters.
     Creates combinations from multi-value parameters.
     """
-    # Create all combinations of multi-value parameters
-    combinations = list(product(
-        request.steps_list,
-        request.scale_list,
-        request.scheduler_list,
-    ))
-    
-    configs = []
-    jobs_per_combo = max(1, request.total_jobs // len(combinations))
+    # Keys shared by every job, split around the per-combination values to keep key order
+    size = {"width": request.width, "height": request.height}
+    shared = {
+        "num_images": request.num_images,
+        "seed": request.seed,
+        "image_strength": request.image_strength,
+        "use_default_neg": request.use_default_neg,
+    }
+    if request.controlnet:
+        shared["controlnet"] = request.controlnet
+    if request.lora:
+        shared["lora"] = request.lora
+        shared["lora_scale"] = request.lora_scale
     
-    for steps, scale, scheduler in combinations:
-        for _ in range(jobs_per_combo):
-            config = {
-                "width": request.width,
-                "height": request.height,
-                "steps": steps,
-                "scale": scale,
-                "scheduler": scheduler,
-                "num_images": request.num_images,
-                "seed": request.seed,
-                "image_strength": request.image_strength,
-                "use_default_neg": request.use_default_neg,
-            }
-            
-            if request.controlnet:
-                config["controlnet"] = request.controlnet
-            
-            if request.lora:
-                config["lora"] = request.lora
-                config["lora_scale"] = request.lora_scale
-            
-            configs.append(config)
+    # Walk the combinations lazily; only the requested number of configs is ever built
+    combination_count = len(request.steps_list) * len(request.scale_list) * len(request.scheduler_list)
+    jobs_per_combo = max(1, request.total_jobs // max(combination_count, 1))
+    configs = (
+        {**size, "steps": steps, "scale": scale, "scheduler": scheduler, **shared}
+        for steps, scale, scheduler in product(
+            request.steps_list,
+            request.scale_list,
+            request.scheduler_list,
+        )
+        for _ in range(jobs_per_combo)
+    )
     
     # Limit to requested total
-    return configs[:request.total_jobs]
+    return list(islice(configs, request.total_jobs))
+
+
+def get_image_stats(db: Session, run_ids: List[str]) -> dict:
+    """
+    Aggregate image counts and credit cost for several runs in one GROUP BY query.
+
+    Returns {run_id: row} with total, unrated, upscaled and cost columns;
+    runs without images are absent.
+    """
+    rows = (
+        db.query(
+            Image.run_id,
+            func.count(Image.id).label("total"),
+            func.sum(case((Image.score_overall.is_(None), 1), else_=0)).label("unrated"),
+            func.sum(case((Image.upscale_url.isnot(None), 1), else_=0)).label("upscaled"),
+            func.coalesce(func.sum(Config.credit_cost), 0.0).label("cost"),
+        )
+        .outerjoin(Config, Config.image_id == Image.id)
+        .filter(Image.run_id.in_(run_ids))
+        .group_by(Image.run_id)
+        .all()
+    )
+    return {row.run_id: row for row in rows}
 
 
 # ============ Routes ============
@@ -122,7 +139,7 @@ async def create_run(request: RunCreateRequest, db: Session = Depends(get_db)):
     # Create the run
     batch_number = get_next_batch_number(db)
     run = Run(
-        id=str(uuid.uuid4()),
+        id=generate_uuid(),
         batch_number=batch_number,
         name=request.name or f"Batch {batch_number}",
         prompt=request.prompt,
@@ -136,21 +153,23 @@ async def create_run(request: RunCreateRequest, db: Session = Depends(get_db)):
     # Generate job configurations
     job_configs = create_job_configs(request)
     
-    # Create jobs
-    jobs_created = []
-    for config in job_configs:
-        job = Job(
-            run_id=run.id,
-            status=JobStatus.queued,
-            config_json=json.dumps(config),
-            init_image_asset_id=request.init_image_asset_id,
-        )
-        db.add(job)
-        db.flush()
-        jobs_created.append({
-            "id": job.id,
-            "config": config,
-        })
+    # Create jobs with one INSERT ... RETURNING, ids in the order of job_configs
+    job_ids = db.execute(
+        insert(Job).returning(Job.id, sort_by_parameter_order=True),
+        [
+            {
+                "run_id": run.id,
+                "status": JobStatus.queued,
+                "config_json": config,
+                "init_image_asset_id": request.init_image_asset_id,
+            }
+            for config in job_configs
+        ],
+    ).scalars().all()
+    jobs_created = [
+        {"id": job_id, "config": config}
+        for job_id, config in zip(job_ids, job_configs)
+    ]
     
     db.commit()
     
@@ -171,43 +190,48 @@ async def create_run(request: RunCreateRequest, db: Session = Depends(get_db)):
 @router.get("")
 async def list_runs(
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Deprecated: page with `cursor` instead"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Also count all runs"),
     db: Session = Depends(get_db),
 ):
     """
     List all runs with summary counts.
     
     Returns total images, unrated count, and upscaled count for each run.
+    Pages are newest first; pass a page's `next_cursor` back as `cursor` for
+    the next one. `total` is null unless include_total is set.
     """
-    # Get runs with pagination
-    runs = db.query(Run).order_by(Run.created_at.desc()).offset(offset).limit(limit).all()
-    total = db.query(Run).count()
+    # Get runs with keyset pagination; id breaks created_at ties
+    created_at_raw = type_coerce(Run.created_at, String)
+    query = db.query(Run, created_at_raw).order_by(Run.created_at.desc(), Run.id.desc())
+    if cursor:
+        query = query.filter(tuple_(created_at_raw, Run.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(offset)
+    rows = query.limit(limit).all()
+    runs = [run for run, _ in rows]
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0].id) if len(rows) == limit else None
+    total = db.query(func.count(Run.id)).scalar() if include_total else None
+    
+    # Image stats and queued job counts for the whole page, one grouped query each
+    run_ids = [run.id for run in runs]
+    image_stats = get_image_stats(db, run_ids)
+    queued_jobs_by_run = dict(
+        db.query(Job.run_id, func.count(Job.id))
+        .filter(Job.run_id.in_(run_ids), Job.status == JobStatus.queued)
+        .group_by(Job.run_id)
+        .all()
+    )
     
     results = []
     for run in runs:
-        # Count images for this run
-        total_images = db.query(Image).filter(Image.run_id == run.id).count()
-        
-        # Count unrated images (no overall score)
-        unrated_count = db.query(Image).filter(
-            Image.run_id == run.id,
-            Image.score_overall.is_(None)
-        ).count()
-        
-        # Count upscaled images (has upscale_url)
-        upscaled_count = db.query(Image).filter(
-            Image.run_id == run.id,
-            Image.upscale_url.isnot(None)
-        ).count()
-        
-        # Get queued jobs count
-        queued_jobs = db.query(Job).filter(
-            Job.run_id == run.id,
-            Job.status == JobStatus.queued
-        ).count()
-        
-        # Calculate total cost from Configs
-        total_cost = db.query(func.sum(Config.credit_cost)).join(Image).filter(Image.run_id == run.id).scalar() or 0.0
+        stats = image_stats.get(run.id)
+        total_images = stats.total if stats else 0
+        unrated_count = stats.unrated if stats else 0
+        upscaled_count = stats.upscaled if stats else 0
+        queued_jobs = queued_jobs_by_run.get(run.id, 0)
+        total_cost = stats.cost if stats else 0.0
         
         results.append({
             "id": run.id,
@@ -227,6 +251,7 @@ async def list_runs(
         "total": total,
         "limit": limit,
         "offset": offset,
+        "next_cursor": next_cursor,
         "runs": results,
     }
 
@@ -238,28 +263,23 @@ async def get_run(run_id: str, db: Session = Depends(get_db)):
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
     
-    # Get counts
-    total_images = db.query(Image).filter(Image.run_id == run.id).count()
-    unrated_count = db.query(Image).filter(
-        Image.run_id == run.id,
-        Image.score_overall.is_(None)
-    ).count()
-    upscaled_count = db.query(Image).filter(
-        Image.run_id == run.id,
-        Image.upscale_url.isnot(None)
-    ).count()
+    # Get counts and total cost (from Configs) in one aggregate
+    stats = get_image_stats(db, [run.id]).get(run.id)
+    total_images = stats.total if stats else 0
+    unrated_count = stats.unrated if stats else 0
+    upscaled_count = stats.upscaled if stats else 0
+    total_cost = stats.cost if stats else 0.0
     
-    # Get job counts
-    jobs_by_status = {}
-    for status in JobStatus:
-        count = db.query(Job).filter(
-            Job.run_id == run.id,
-            Job.status == status
-        ).count()
-        jobs_by_status[status.value] = count
-    
-    # Calculate total cost from Configs
-    total_cost = db.query(func.sum(Config.credit_cost)).join(Image).filter(Image.run_id == run.id).scalar() or 0.0
+    # Get job counts in one GROUP BY; statuses without jobs report 0
+    jobs_by_status = {status.value: 0 for status in JobStatus}
+    jobs_by_status.update(
+        (status.value, count)
+        for status, count in (
+            db.query(Job.status, func.count(Job.id))
+            .filter(Job.run_id == run.id)
+            .group_by(Job.status)
+        )
+    )
     
     return {
         "id": run.id,
@@ -290,5 +310,6 @@ async def delete_run(run_id: str, db: Session = Depends(get_db)):
     # SQLAlchemy will cascade delete images, configs, and jobs
     db.delete(run)
     db.commit()
+    response_cache.invalidate()
     
     return {"success": True, "message": f"Run {run_id} deleted"}
@@ -1 +1 @@
-"""Services module for external API integrations."""
+"""Services module for external API integrations and shared caches."""
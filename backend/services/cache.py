@@ -0,0 +1,57 @@
+"""In-process response cache for read-heavy GET endpoints."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    Small thread-safe LRU cache with a per-entry max age.
+
+    Write routes call `invalidate()` after committing so readers never see
+    data older than the last write. Each invalidation bumps `generation`;
+    `set()` drops values computed under an older generation, which keeps a
+    slow reader from re-caching rows it loaded before a concurrent write.
+    """
+
+    def __init__(self, max_age: float = 60.0, max_entries: int = 256):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.max_age:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, generation: int) -> None:
+        """Store value unless an invalidation happened since `generation` was read."""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix: str = "") -> None:
+        """Drop every entry whose key starts with prefix (all entries by default)."""
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+# Shared by the image/analysis read endpoints; cleared by every route that writes images
+response_cache = ResponseCache()
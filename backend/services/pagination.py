@@ -0,0 +1,21 @@
+"""Opaque keyset cursors shared by the paginated list endpoints."""
+import base64
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """Cursor naming the last row of a page by its stored created_at and id."""
+    return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Split a cursor from encode_cursor back into (created_at, id); 400 if malformed."""
+    try:
+        created_at, sep, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rpartition("|")
+    except ValueError:
+        created_at = sep = row_id = ""
+    if not (sep and created_at and row_id):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, row_id
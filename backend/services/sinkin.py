@@ -1,19 +1,152 @@
 """SinkIn AI API service for inference and upscaling."""
-import json
+import atexit
+import gzip
+import hashlib
 import logging
+import mimetypes
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlencode
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 
 from config import get_settings
+from schemas import SchedulerType
+from services.cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive connections to the SinkIn host; sync routes and upscale workers share them
+SINKIN_POOL_CONNECTIONS = 10
+SINKIN_POOL_MAXSIZE = 32
+# Every SinkIn call is a POST that may be billed, so only failures where SinkIn did not
+# take the request are retried: failed connects, and 429/503 (honouring Retry-After).
+# Read errors and timeouts are never retried since the generation may still be running.
+# A status retry resends the body, so this policy is only for replayable bodies (form
+# dicts, bytes, str); SinkInService._post sends anything else with SINKIN_UPLOAD_RETRIES.
+SINKIN_RETRIES = Retry(
+    total=4,
+    read=0,
+    backoff_factor=0.8,
+    status_forcelist=(429, 503),
+    allowed_methods=frozenset({"POST"}),
+)
+# Streamed bodies (multipart uploads) cannot be rewound, so a status retry would resend
+# the original Content-Length with an empty body; they only retry failed connects
+SINKIN_UPLOAD_RETRIES = Retry(
+    total=4,
+    read=0,
+    status=0,
+    backoff_factor=0.8,
+    allowed_methods=frozenset({"POST"}),
+)
+# (connect, read) timeouts in seconds. A dead host or stalled handshake fails within
+# the connect budget and is retried, instead of waiting out the long read timeout.
+INFERENCE_TIMEOUT = (5, 120)  # generation can take up to two minutes
+UPSCALE_TIMEOUT = (5, 120)
+MODELS_TIMEOUT = (3, 15)  # small listing call
 
-def _pretty(data: Dict[str, Any]) -> str:
-    """Nicely format dictionaries for console logs."""
-    return json.dumps(data, indent=2, sort_keys=True)
+# Parameter limits SinkIn enforces (mirroring InferenceRequest); inference() checks them
+# locally so a typo fails immediately instead of after a round-trip
+SIZE_RANGE = (128, 896)
+SIZE_MULTIPLE = 8
+STEPS_RANGE = (1, 50)
+SCALE_RANGE = (1, 20)
+NUM_IMAGES_RANGE = (1, 4)
+SCHEDULERS = frozenset(scheduler.value for scheduler in SchedulerType)
+
+# With sinkin_gzip_requests on, form bodies at least this large are sent gzipped
+GZIP_MIN_BYTES = 1024
+
+# Successful fixed-seed text2img responses, replayed for identical payloads instead of
+# paying for the same generation twice; entries expire before SinkIn's image URLs do
+INFERENCE_CACHE_MAX_AGE = 3600.0
+_inference_cache = ResponseCache(max_age=INFERENCE_CACHE_MAX_AGE, max_entries=256)
+
+# inference_many: parallel calls per batch, and the overall call rate across batches
+INFERENCE_MANY_CONCURRENCY = 4
+INFERENCE_CALLS_PER_MINUTE = 30
+
+
+class _Pretty:
+    """Nicely format a dictionary for console logs, only when the record is emitted."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    def __str__(self) -> str:
+        return orjson.dumps(self.data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode()
+
+
+def _loads(response: requests.Response) -> Any:
+    """Decode a JSON response body with orjson; bad JSON raises like response.json() does."""
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        raise requests.JSONDecodeError(e.msg, e.doc, e.pos) from e
+
+
+def _payload_hash(payload: Dict[str, Any]) -> str:
+    """Stable digest of a request payload (without the access token) for cache keys."""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class InvalidInferenceParams(ValueError):
+    """An inference parameter is outside the limits SinkIn accepts."""
+
+
+class _RateLimiter:
+    """Thread-safe token bucket: `per_minute` calls a minute, bursting up to that many."""
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _SinkInAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets also send TCP keepalives.
+
+    urllib3 already disables Nagle (TCP_NODELAY) by default. Keepalive probes stop
+    NATs and proxies from dropping a connection that sits silent while SinkIn
+    generates, and let idle pooled connections that died be noticed.
+    """
+
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
 
 
 class SinkInService:
@@ -22,13 +155,77 @@ class SinkInService:
     def __init__(self):
         self.settings = get_settings()
         self.base_url = self.settings.sinkin_base_url
+        # Read once; the app still starts without a key and each call reports it missing
+        self._api_key = self.settings.sinkin_api_key
+        self.gzip_requests = self.settings.sinkin_gzip_requests
+        # Pooled sessions so repeated calls skip the TCP and TLS handshakes; img2img
+        # uploads get their own because their bodies cannot be replayed on a retry
+        self._session = self._pooled_session(SINKIN_RETRIES)
+        self._upload_session = self._pooled_session(SINKIN_UPLOAD_RETRIES)
+        self._rate_limiter = _RateLimiter(INFERENCE_CALLS_PER_MINUTE)
+
+    @staticmethod
+    def _pooled_session(retries: Retry) -> requests.Session:
+        """Build a session whose keep-alive pool retries with the given policy."""
+        session = requests.Session()
+        adapter = _SinkInAdapter(
+            pool_connections=SINKIN_POOL_CONNECTIONS,
+            pool_maxsize=SINKIN_POOL_MAXSIZE,
+            max_retries=retries,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _post(self, url: str, data: Any, **kwargs) -> requests.Response:
+        """POST through the session whose retry policy can safely resend `data`."""
+        replayable = data is None or isinstance(data, (dict, bytes, str))
+        session = self._session if replayable else self._upload_session
+        return session.post(url, data=data, **kwargs)
+
+    def close(self) -> None:
+        """Release the pooled connections."""
+        self._session.close()
+        self._upload_session.close()
 
     def _get_api_key(self) -> str:
-        """Get API key from settings."""
-        api_key = self.settings.sinkin_api_key
-        if not api_key:
+        """Get the API key read from settings at startup."""
+        if not self._api_key:
             raise ValueError("SINKIN_API_KEY not configured. Please add it to .env file.")
-        return api_key
+        return self._api_key
+
+    def reload_api_key(self) -> None:
+        """Re-read settings (environment and .env) and pick up a changed API key."""
+        get_settings.cache_clear()
+        self.settings = get_settings()
+        self._api_key = self.settings.sinkin_api_key
+
+    @staticmethod
+    def _validate(width: int, height: int, steps: int, scale: float, num_images: int, scheduler: str) -> None:
+        """Raise InvalidInferenceParams for parameters SinkIn would reject."""
+        for name, size in (("width", width), ("height", height)):
+            if not SIZE_RANGE[0] <= size <= SIZE_RANGE[1]:
+                raise InvalidInferenceParams(
+                    f"{name} must be between {SIZE_RANGE[0]} and {SIZE_RANGE[1]}, got {size}"
+                )
+            if size % SIZE_MULTIPLE:
+                raise InvalidInferenceParams(
+                    f"{name} must be a multiple of {SIZE_MULTIPLE}, got {size}"
+                )
+        if not STEPS_RANGE[0] <= steps <= STEPS_RANGE[1]:
+            raise InvalidInferenceParams(
+                f"steps must be between {STEPS_RANGE[0]} and {STEPS_RANGE[1]}, got {steps}"
+            )
+        if not SCALE_RANGE[0] <= scale <= SCALE_RANGE[1]:
+            raise InvalidInferenceParams(
+                f"scale must be between {SCALE_RANGE[0]} and {SCALE_RANGE[1]}, got {scale}"
+            )
+        if not NUM_IMAGES_RANGE[0] <= num_images <= NUM_IMAGES_RANGE[1]:
+            raise InvalidInferenceParams(
+                f"num_images must be between {NUM_IMAGES_RANGE[0]} and {NUM_IMAGES_RANGE[1]}, got {num_images}"
+            )
+        if scheduler not in SCHEDULERS:
+            raise InvalidInferenceParams(f"Unknown scheduler: {scheduler}")
 
     def inference(
         self,
@@ -49,18 +246,28 @@ class SinkInService:
         image_strength: float = 0.75,
         controlnet: Optional[str] = None,
         log_context: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
     ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
         Call SinkIn /inference API.
+
+        With use_cache, a successful response for a fixed seed (seed != -1) and no
+        init image is replayed for an identical payload within the cache's max age;
+        replayed responses report a credit_cost of 0.
         
         Returns:
-            Tuple of (payload_dict, response_dict)
+            Tuple of (payload_dict without the access token, response_dict)
+
+        Raises:
+            InvalidInferenceParams: a parameter outside SinkIn's limits
+            ValueError: API key not configured
         """
+        self._validate(width, height, steps, scale, num_images, scheduler)
         api_key = self._get_api_key()
         
-        # Build request payload
+        # Build request payload; the access token is only added to the posted form,
+        # so this dict is safe to log, cache-key and return as-is
         payload = {
-            "access_token": api_key,
             "model_id": model_id,
             "prompt": prompt,
             "width": width,
@@ -81,21 +288,30 @@ class SinkInService:
             payload["lora_scale"] = lora_scale
 
         # Prepare files for img2img
-        files = None
+        image_path = None
         if init_image_path:
             payload["image_strength"] = image_strength
             if controlnet:
                 payload["controlnet"] = controlnet
-            
-            # Open image file
             image_path = Path(init_image_path)
-            if image_path.exists():
-                files = {"init_image_file": open(image_path, "rb")}
 
-        # Create payload copy without API key for logging
-        payload_for_log = {k: v for k, v in payload.items() if k != "access_token"}
-        
         context = log_context or {}
+
+        # Random seeds and img2img uploads are never served from the cache
+        cache_key = None
+        if use_cache and seed != -1 and not init_image_path:
+            cache_key = _payload_hash(payload)
+            cached = _inference_cache.get(cache_key)
+            if cached is not None:
+                logger.info(
+                    "♻️ SinkIn inference cache HIT | batch=%s job=%s inf_id=%s",
+                    context.get("batch_number"),
+                    context.get("job_id"),
+                    cached.get("inf_id"),
+                )
+                return payload, {**cached, "credit_cost": 0}
+            logger.debug("SinkIn inference cache MISS | key=%s", cache_key)
+
         logger.info(
             "🛠️  Generating images | batch=%s job=%s model=%s scheduler=%s seed=%s num_images=%s",
             context.get("batch_number"),
@@ -105,41 +321,90 @@ class SinkInService:
             seed,
             num_images,
         )
-        logger.debug("📦 Payload\n%s", _pretty(payload_for_log))
+        logger.debug("📦 Payload\n%s", _Pretty(payload))
 
-        try:
-            response = requests.post(
-                f"{self.base_url}/inference",
-                data=payload,
-                files=files,
-                timeout=120,  # 2 minute timeout for generation
-            )
-            response.raise_for_status()
-            response_data = response.json()
-            logger.info(
-                "✨ SinkIn inference succeeded | batch=%s job=%s inf_id=%s credit=%s images=%s",
-                context.get("batch_number"),
-                context.get("job_id"),
-                response_data.get("inf_id"),
-                response_data.get("credit_cost"),
-                len(response_data.get("images", [])),
-            )
-        except requests.RequestException as e:
-            response_data = {"error_code": 1, "message": str(e)}
-            logger.error(
-                "💥 SinkIn inference failed | batch=%s job=%s model=%s error=%s\nPayload:\n%s",
-                context.get("batch_number"),
-                context.get("job_id"),
-                model_id,
-                str(e),
-                _pretty(payload_for_log),
-            )
-        finally:
-            # Close file if opened
-            if files:
-                files["init_image_file"].close()
+        with ExitStack() as stack:
+            # The init image stays open for the request and is closed however it ends
+            init_image = None
+            if image_path:
+                try:
+                    init_image = stack.enter_context(open(image_path, "rb"))
+                except FileNotFoundError:
+                    pass  # Sent without the file, as when the asset has been deleted
+
+            try:
+                form = {"access_token": api_key, **payload}
+                request_kwargs: Dict[str, Any] = {"data": form}
+                if self.gzip_requests and not init_image:
+                    encoded = urlencode(form).encode()
+                    if len(encoded) >= GZIP_MIN_BYTES:
+                        request_kwargs = {
+                            "data": gzip.compress(encoded),
+                            "headers": {
+                                "Content-Type": "application/x-www-form-urlencoded",
+                                "Content-Encoding": "gzip",
+                            },
+                        }
+                if init_image:
+                    # Stream the multipart body from disk instead of building it in memory
+                    content_type = mimetypes.guess_type(image_path.name)[0] or "application/octet-stream"
+                    body = MultipartEncoder(fields={
+                        **{key: str(value) for key, value in form.items()},
+                        "init_image_file": (image_path.name, init_image, content_type),
+                    })
+                    request_kwargs = {"data": body, "headers": {"Content-Type": body.content_type}}
+                response = self._post(
+                    f"{self.base_url}/inference",
+                    timeout=INFERENCE_TIMEOUT,
+                    **request_kwargs,
+                )
+                response.raise_for_status()
+                response_data = _loads(response)
+                logger.info(
+                    "✨ SinkIn inference succeeded | batch=%s job=%s inf_id=%s credit=%s images=%s",
+                    context.get("batch_number"),
+                    context.get("job_id"),
+                    response_data.get("inf_id"),
+                    response_data.get("credit_cost"),
+                    len(response_data.get("images", [])),
+                )
+                if cache_key and response_data.get("error_code", 0) == 0:
+                    _inference_cache.set(cache_key, response_data, _inference_cache.generation)
+            except requests.RequestException as e:
+                response_data = {"error_code": 1, "message": str(e)}
+                logger.error(
+                    "💥 SinkIn inference failed | batch=%s job=%s model=%s error=%s\nPayload:\n%s",
+                    context.get("batch_number"),
+                    context.get("job_id"),
+                    model_id,
+                    str(e),
+                    _Pretty(payload),
+                )
+
+        return payload, response_data
 
-        return payload_for_log, response_data
+    def inference_many(
+        self,
+        calls: List[Dict[str, Any]],
+        concurrency: int = INFERENCE_MANY_CONCURRENCY,
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Run several inference calls in parallel.
+
+        Each item holds keyword arguments for inference(). At most `concurrency`
+        calls are in flight, and every call first waits on the service-wide rate
+        limiter so bursts stay under INFERENCE_CALLS_PER_MINUTE. Results come back
+        in input order; failed calls carry an error response as usual.
+        """
+        if not calls:
+            return []
+
+        def run(kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            self._rate_limiter.acquire()
+            return self.inference(**kwargs)
+
+        with ThreadPoolExecutor(max_workers=min(len(calls), concurrency)) as pool:
+            return list(pool.map(run, calls))
 
     def upscale(
         self,
@@ -178,13 +443,13 @@ class SinkInService:
             payload["strength"] = strength
         
         try:
-            response = requests.post(
+            response = self._post(
                 f"{self.base_url}/upscale",
                 data=payload,
-                timeout=120,  # Upscaling can take time
+                timeout=UPSCALE_TIMEOUT,
             )
             response.raise_for_status()
-            return response.json()
+            return _loads(response)
         except requests.RequestException as e:
             return {"error_code": 1, "message": str(e)}
 
@@ -193,16 +458,35 @@ class SinkInService:
         api_key = self._get_api_key()
         
         try:
-            response = requests.post(
+            response = self._post(
                 f"{self.base_url}/models",
                 data={"access_token": api_key},
-                timeout=30,
+                timeout=MODELS_TIMEOUT,
             )
             response.raise_for_status()
-            return response.json()
+            return _loads(response)
         except requests.RequestException as e:
             return {"error_code": 1, "message": str(e)}
 
+    def warmup(self) -> None:
+        """
+        Open a pooled connection to SinkIn in the background with a cheap /models call,
+        so the first inference of a session does not pay the TCP and TLS handshakes.
+        Does nothing without an API key.
+        """
+        if not self._api_key:
+            return
+
+        def run() -> None:
+            result = self.get_models()
+            logger.debug("🔥 SinkIn connection warmed up | error=%s", result.get("message"))
+
+        threading.Thread(target=run, name="sinkin-warmup", daemon=True).start()
+
 
-# Singleton instance
-sinkin_service = SinkInService()
+@lru_cache(maxsize=1)
+def get_sinkin_service() -> SinkInService:
+    """Get the shared service, created (and its pool registered for cleanup) on first use."""
+    service = SinkInService()
+    atexit.register(service.close)
+    return service
@@ -0,0 +1,82 @@
+"""SinkIn client retry behaviour against a local fake server.
+
+Run from backend/: python -m unittest discover -s tests
+"""
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from services.sinkin import SinkInService
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """Answers the first POST with 503 and later ones with a successful inference."""
+
+    protocol_version = "HTTP/1.1"
+    # A request whose body never arrives fails the read instead of hanging the test
+    timeout = 5
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        server.bodies.append(body)
+        if len(server.bodies) == 1:
+            self._reply(503, b'{"error_code": 1, "message": "busy"}')
+        else:
+            self._reply(200, b'{"error_code": 0, "inf_id": "inf1", "images": ["u"]}')
+
+    def _reply(self, status: int, content: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class SinkInRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+        self.server.bodies = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.service = SinkInService()
+        self.service._api_key = "test-key"
+        self.service.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.service.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_form_request_is_retried_after_503(self):
+        _, response = self.service.inference("model", "prompt", use_cache=False)
+
+        self.assertEqual(response["inf_id"], "inf1")
+        self.assertEqual(len(self.server.bodies), 2)
+        self.assertEqual(self.server.bodies[0], self.server.bodies[1])
+
+    def test_streamed_upload_is_not_replayed_after_503(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            image_path = Path(tmp) / "init.png"
+            image_path.write_bytes(b"\x89PNG" + b"\x00" * 4096)
+
+            started = time.monotonic()
+            _, response = self.service.inference("model", "prompt", init_image_path=str(image_path))
+            elapsed = time.monotonic() - started
+
+        # One full upload, then the 503 is reported instead of resending an empty body
+        self.assertEqual(response["error_code"], 1)
+        self.assertIn("503", response["message"])
+        self.assertEqual(len(self.server.bodies), 1)
+        self.assertIn(b"init_image_file", self.server.bodies[0])
+        self.assertLess(elapsed, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()